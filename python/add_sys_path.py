@@ -4,13 +4,14 @@ Script to add the given paths to sys.path
 
 from __future__ import annotations
 
-import sys
 import os
 
+from vscode_unreal_python.path_index import SYS_PATH_INDEX
+
 def add_paths(paths: list[str]):
     for vsc_path in paths:
         normalized_path = os.path.normpath(vsc_path)
         # Make sure the path doesn't already exist in sys.path
-        if not any(normalized_path.lower() == os.path.normpath(path).lower() for path in sys.path):
-            sys.path.append(normalized_path)
+        if normalized_path not in SYS_PATH_INDEX:
+            SYS_PATH_INDEX.append(normalized_path)
             print(f'Added "{normalized_path}" to sys.path')
@@ -1,11 +1,24 @@
 from __future__ import annotations
 
+import collections
+import subprocess
+import importlib
+import threading
+import time
+import json
+import uuid
 import os
 
 import unreal
 
 VSCODE_DEBUG_SERVER_ENV_VAR = "vscode_debugpy_server_port"
 
+# Max number of lines of pip output kept for each install job
+MAX_INSTALL_OUTPUT_LINES = 200
+
+# Install jobs that haven't finished or whose result hasn't been retrieved yet, {job_id: job}
+INSTALL_JOBS: dict[str, DebugpyInstallJob] = {}
+
 
 def is_debugpy_installed() -> bool:
     """
@@ -18,36 +31,141 @@ def is_debugpy_installed() -> bool:
         return False
 
 
-def install_debugpy() -> bool:
+class EInstallState:
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class DebugpyInstallJob:
     """
-    Installs debugpy using the current Unreal Python interpreter.
+    Installs debugpy with pip in a background thread, so the editor stays responsive during the install.
+    If a wheel cache directory is given, debugpy is first installed offline from the cache,
+    and only if no compatible wheel is found the wheel is downloaded to the cache and then installed from there.
+    """
+
+    def __init__(self, python_exe: str, wheel_cache_dirpath: str | None = None):
+        self.id = uuid.uuid4().hex
+        self.python_exe = python_exe
+        self.wheel_cache_dirpath = wheel_cache_dirpath
+
+        self.state = EInstallState.RUNNING
+        self.step = ""
+        self.output: collections.deque[str] = collections.deque(maxlen=MAX_INSTALL_OUTPUT_LINES)
+        self.start_time = time.perf_counter()
+        self.end_time: float | None = None
+
+        self.thread = threading.Thread(target=self.run, name=f"debugpy-install-{self.id}", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def run_pip(self, step: str, args: list[str]) -> bool:
+        """ Run a pip command, collecting its output while it's running """
+        self.step = step
+        self.output.append(f"> pip {' '.join(args)}")
+
+        env = os.environ.copy()
+        env["PYTHONNOUSERSITE"] = "1"
+
+        try:
+            process = subprocess.Popen([self.python_exe, "-m", "pip", *args, "--disable-pip-version-check"],
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
+            assert process.stdout
+            for line in process.stdout:
+                self.output.append(line.rstrip())
+            return process.wait() == 0
+        except Exception as e:
+            self.output.append(f"Failed to run pip: {e}")
+            return False
+
+    def run(self):
+        if self.wheel_cache_dirpath:
+            install_from_cache_args = ["install", "--no-index", "--find-links", self.wheel_cache_dirpath, "debugpy"]
+            success = self.run_pip("Installing from the wheel cache", install_from_cache_args)
+            if not success:
+                os.makedirs(self.wheel_cache_dirpath, exist_ok=True)
+                success = self.run_pip("Downloading", ["download", "--only-binary=:all:", "--dest", self.wheel_cache_dirpath, "debugpy"])
+                if success:
+                    success = self.run_pip("Installing", install_from_cache_args)
+        else:
+            success = self.run_pip("Installing", ["install", "debugpy"])
+
+        self.step = ""
+        self.state = EInstallState.SUCCEEDED if success else EInstallState.FAILED
+        self.end_time = time.perf_counter()
+
+    def get_status(self) -> dict:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "step": self.step,
+            "output": list(self.output),
+            "total_time": round(((self.end_time or time.perf_counter()) - self.start_time) * 1000, 3)
+        }
+
+
+def start_debugpy_install(wheel_cache_dirpath: str | None = None) -> str:
     """
-    import subprocess
+    Start installing debugpy in the background, poll the install using `get_debugpy_install_status`
+    :param wheel_cache_dirpath: Directory where downloaded debugpy wheels are cached, shared between engine installs & projects
+    :returns: The id of the install job, an empty string if the interpreter could not be found
+    """
+    for job in INSTALL_JOBS.values():
+        if job.state == EInstallState.RUNNING:
+            return job.id
 
     python_exe = unreal.get_interpreter_executable_path()
     if not python_exe:
-        return False
+        return ""
 
-    debugpy_install_args = [python_exe, "-m", "pip", "install", "debugpy"]
+    job = DebugpyInstallJob(python_exe, wheel_cache_dirpath)
+    INSTALL_JOBS[job.id] = job
+    job.start()
 
-    env = os.environ.copy()
-    env["PYTHONNOUSERSITE"] = "1"
+    return job.id
 
-    try:
-        result = subprocess.run(debugpy_install_args, capture_output=True, check=True, text=True, env=env)
-        unreal.log(result.stdout)
-        unreal.log(result.stderr)
-    except subprocess.CalledProcessError as e:
-        unreal.log_error(f"Failed to install debugpy: {e}")
-        unreal.log_error(e.stdout)
-        unreal.log_error(e.stderr)
-    except Exception as e:
-        unreal.log_error(f"Failed to install debugpy: {e}")
-
-    # Make sure the installation was successful by trying to import debugpy
-    import debugpy
 
-    return True
+def get_debugpy_install_status(job_id: str) -> str | None:
+    """
+    :returns: The status of the install job as a JSON object, or None if no job with the given id exists
+    """
+    job = INSTALL_JOBS.get(job_id)
+    if not job:
+        return None
+
+    status = job.get_status()
+
+    # Called from the game thread, log the output here as the log functions shouldn't be called from the install thread
+    if job.state != EInstallState.RUNNING:
+        del INSTALL_JOBS[job_id]
+
+        # Make sure the newly installed module can be found by the import system
+        importlib.invalidate_caches()
+
+        output = "\n".join(job.output)
+        if job.state == EInstallState.SUCCEEDED and is_debugpy_installed():
+            unreal.log(output)
+        else:
+            status["state"] = EInstallState.FAILED
+            unreal.log_error(f"Failed to install debugpy:\n{output}")
+
+    return json.dumps(status)
+
+
+def install_debugpy(wheel_cache_dirpath: str | None = None) -> bool:
+    """
+    Installs debugpy using the current Unreal Python interpreter.
+    Blocks until the install is finished, prefer `start_debugpy_install` to keep the editor responsive.
+    """
+    job_id = start_debugpy_install(wheel_cache_dirpath)
+    if not job_id:
+        return False
+
+    INSTALL_JOBS[job_id].thread.join()
+
+    status = get_debugpy_install_status(job_id)
+    return bool(status) and json.loads(status)["state"] == EInstallState.SUCCEEDED
 
 
 def start_debugpy_server(port: int) -> bool:
@@ -7,12 +7,23 @@ containing the table of contents, including classes, methods, properties, etc.
 from __future__ import annotations
 
 import warnings
+import hashlib
 import inspect
 import types
-import json
+import io
+import os
+
+from typing import TextIO
+from json.encoder import encode_basestring_ascii as encode_json_string
 
 import unreal
 
+from vscode_unreal_python.telemetry import span
+
+# Increment this whenever the layout of the table of contents changes, to invalidate existing caches
+TOC_CACHE_VERSION = 1
+TOC_CACHE_FILENAME = "vscode-toc-cache.json"
+
 
 def issubclass_strict(__cls: type, __class_or_tuple):
     if not issubclass(__cls, __class_or_tuple):
@@ -27,119 +38,254 @@ def issubclass_strict(__cls: type, __class_or_tuple):
 class UnrealClassRepresentation:
     """
     Each class in the unreal API will be represented by an instance of this class. (e.g. Enums, Structs, Classes)
-    This class contains all methods, properties, constants, etc. of the class it represents.
+    This class contains the names of all methods, properties, constants, etc. of the class it represents.
+    Only the names are kept, so the members themselves can be garbage collected once the class has been written.
     """
+    __slots__ = ("name", "methods", "classmethods", "properties", "constants")
+
     def __init__(self, name: str, cls):
         self.name = name
-        self.cls = cls
 
-        self.methods: list[tuple[str, types.MethodDescriptorType]] = []
-        self.classmethods: list[tuple[str, types.BuiltinFunctionType]] = []
-        self.properties: list[tuple[str, unreal.EnumBase | unreal.StructBase]] = []
-        self.constants: list[tuple[str, int]] = []
+        self.methods: list[str] = []
+        self.classmethods: list[str] = []
+        self.properties: list[str] = []
+        self.constants: list[str] = []
 
-        self.load_members()
+        self.load_members(cls)
 
-    def load_members(self):
-        for name, member in inspect.getmembers(self.cls):
+    def load_members(self, cls):
+        # Only walk the class's own members, `inspect.getmembers` would resolve (and sort) every inherited member as well
+        cls_dict = cls.__dict__
+        for name in sorted(cls_dict):
             # ignore private methods / properties
             if name.startswith("_"):
                 continue
 
-            # ignore inherited methods / properties
-            if name not in self.cls.__dict__:
-                continue
+            # Most members can be classified by their exact type, without looking them up on the class
+            member = cls_dict[name]
+            member_type = type(member)
+            if member_type is types.MethodDescriptorType:
+                self.methods.append(name)
+            elif member_type is types.GetSetDescriptorType or member_type is types.MemberDescriptorType:
+                self.properties.append(name)
+            elif member_type is types.ClassMethodDescriptorType:
+                self.classmethods.append(name)
+            else:
+                try:
+                    member = getattr(cls, name)
+                except AttributeError:
+                    pass
 
-            if inspect.ismethoddescriptor(member):
-                self.methods.append((name, member))
-            elif inspect.isgetsetdescriptor(member):
-                self.properties.append((name, member))
-            elif issubclass(type(member), unreal.EnumBase):
-                self.properties.append((name, member))
-            elif issubclass(type(member), unreal.StructBase):
-                self.properties.append((name, member))
-            elif inspect.isbuiltin(member):
-                self.classmethods.append((name, member))
-            elif inspect.ismemberdescriptor(member):
-                # TODO: this might be incorrect
-                self.properties.append((name, member))
-            elif isinstance(member, int):
-                self.constants.append((name, member))
-            # else:
-            #     print(f"{name}: {member} -> {type(member)}")
+                self.add_member(name, member)
+
+    def add_member(self, name: str, member):
+        if inspect.ismethoddescriptor(member):
+            self.methods.append(name)
+        elif inspect.isgetsetdescriptor(member):
+            self.properties.append(name)
+        elif issubclass(type(member), unreal.EnumBase):
+            self.properties.append(name)
+        elif issubclass(type(member), unreal.StructBase):
+            self.properties.append(name)
+        elif inspect.isbuiltin(member):
+            self.classmethods.append(name)
+        elif inspect.ismemberdescriptor(member):
+            # TODO: this might be incorrect
+            self.properties.append(name)
+        elif isinstance(member, int):
+            self.constants.append(name)
+        # else:
+        #     print(f"{name}: {member} -> {type(member)}")
 
     def get_dict(self):
         data = {}
 
-        for object_type, object_list, in (("func", self.methods),
-                                        ("cls_func", self.classmethods),
-                                        ("prop", self.properties),
-                                        ("const", self.constants)
-                                        ):
-            if object_list:
-                data[object_type] = [name for name, member in object_list]
+        for object_type, names, in (("func", self.methods),
+                                    ("cls_func", self.classmethods),
+                                    ("prop", self.properties),
+                                    ("const", self.constants)
+                                    ):
+            if names:
+                data[object_type] = names
 
         return data
 
+    def get_json(self) -> str:
+        """ Same as `json.dumps(self.get_dict(), separators=(',', ':'))`, without creating the dict """
+        return "{" + ",".join(
+            f'"{object_type}":[{",".join(map(encode_json_string, names))}]'
+            for object_type, names in (("func", self.methods),
+                                       ("cls_func", self.classmethods),
+                                       ("prop", self.properties),
+                                       ("const", self.constants)
+                                       )
+            if names
+        ) + "}"
+
 
 class TableOfContents:
-    """ Main class used for generating the table of contents. """
+    """
+    Main class used for generating the table of contents.
+    Only the classes are collected when loading, each class is inspected while it's written to the JSON output.
+    """
     def __init__(self):
-        self.classes: list[UnrealClassRepresentation] = []
-        self.enums: list[UnrealClassRepresentation] = []
-        self.struct: list[UnrealClassRepresentation] = []
-        self.delegates: list[UnrealClassRepresentation] = []
-        self.natives: list[UnrealClassRepresentation] = []
-        self.functions: list[tuple[str, types.BuiltinFunctionType | types.FunctionType]] = []
+        self.classes: list[tuple[str, type]] = []
+        self.enums: list[tuple[str, type]] = []
+        self.struct: list[tuple[str, type]] = []
+        self.delegates: list[tuple[str, type]] = []
+        self.natives: list[tuple[str, type]] = []
+        self.functions: list[str] = []
 
     def load(self):
         """
         Load all classes, enums, structs, delegates, functions, etc. from the unreal module.
         """
-        for object_name, obj in inspect.getmembers(unreal):
+        for object_name, obj in sorted(vars(unreal).items()):
             if inspect.isclass(obj):
-                classobject = UnrealClassRepresentation(object_name, obj)
-
                 if issubclass_strict(obj, unreal.EnumBase):
-                    self.enums.append(classobject)
+                    self.enums.append((object_name, obj))
                 elif issubclass_strict(obj, unreal.StructBase):
-                    self.struct.append(classobject)
+                    self.struct.append((object_name, obj))
                 elif issubclass_strict(obj, (unreal.DelegateBase, unreal.MulticastDelegateBase)):
-                    self.delegates.append(classobject)
+                    self.delegates.append((object_name, obj))
                 elif issubclass_strict(obj, unreal.Object):
-                    self.classes.append(classobject)
+                    self.classes.append((object_name, obj))
                 else:
-                    self.natives.append(classobject)
+                    self.natives.append((object_name, obj))
 
             elif inspect.isfunction(obj) or isinstance(obj, types.BuiltinFunctionType):
-                self.functions.append((object_name, obj))
+                self.functions.append(object_name)
 
             # else:
             #     print(f"Skip adding {object_name}: {obj} to the toc.")
 
+    def get_sections(self):
+        return (("Native", self.natives),
+                ("Struct", self.struct),
+                ("Class", self.classes),
+                ("Enum", self.enums),
+                ("Delegate", self.delegates),
+                )
+
     def get_dict(self):
         """ Generate a dictionary containing the table of contents """
         data = {}
-        for name, object_list, in (("Native", self.natives),
-                                   ("Struct", self.struct),
-                                   ("Class", self.classes),
-                                   ("Enum", self.enums),
-                                   ("Delegate", self.delegates),
-                                   ):
+        for name, object_list in self.get_sections():
+            data[name] = {object_name: UnrealClassRepresentation(object_name, cls).get_dict() for object_name, cls in object_list}
 
-            data[name] = {x.name: x.get_dict() for x in object_list}
-
-        data["Function"] = {name: {} for name, function in self.functions}
+        data["Function"] = {name: {} for name in self.functions}
 
         return data
 
+    def write_json(self, file: TextIO):
+        """
+        Write the table of contents as JSON to a file-like object, one class at a time.
+        The output is the same as `json.dumps(self.get_dict(), separators=(',', ':'))`
+        """
+        file.write("{")
+        for name, object_list in self.get_sections():
+            file.write(f'{encode_json_string(name)}:{{')
+            for index, (object_name, cls) in enumerate(object_list):
+                if index:
+                    file.write(",")
+                file.write(f'{encode_json_string(object_name)}:{UnrealClassRepresentation(object_name, cls).get_json()}')
+            file.write("},")
+
+        file.write('"Function":{')
+        file.write(",".join(f'{encode_json_string(name)}:{{}}' for name in self.functions))
+        file.write("}}")
+
+
+def get_cache_filepath() -> str:
+    """ Get the filepath where the table of contents is cached, next to the generated 'unreal.py' stub file """
+    return os.path.join(os.path.abspath(unreal.Paths.project_intermediate_dir()), "PythonStub", TOC_CACHE_FILENAME)
+
+
+def get_cache_key() -> str:
+    """
+    Get a key identifying the current Unreal Python API.
+    Based on the engine version, the name of each object in the unreal module and the number of members of each class,
+    so that the key changes when e.g. a plugin is enabled/disabled or the engine is updated.
+    """
+    fingerprint = hashlib.sha1()
+    for object_name, obj in sorted(vars(unreal).items()):
+        fingerprint.update(object_name.encode())
+        if inspect.isclass(obj):
+            fingerprint.update(str(len(obj.__dict__)).encode())
+
+    return f"{TOC_CACHE_VERSION}-{unreal.SystemLibrary.get_engine_version()}-{fingerprint.hexdigest()}"
+
+
+def read_cache(filepath: str, cache_key: str) -> str | None:
+    """ Read the cached table of contents, if it was generated with the same cache key """
+    try:
+        with open(filepath, 'r', encoding="utf-8") as file:
+            if file.readline().rstrip("\n") != cache_key:
+                return None
+            return file.read()
+    except OSError:
+        return None
+
+
+def write_cache(filepath: str, cache_key: str, table_of_contents: TableOfContents) -> bool:
+    """
+    Stream the table of contents as JSON into the cache, the first line of the file is the cache key
+    :returns: True if the cache was written
+    """
+    # Write to a temp file first, so a partially written cache is never read
+    temp_filepath = f"{filepath}.tmp"
+    try:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(temp_filepath, 'w', encoding="utf-8") as file:
+            file.write(f"{cache_key}\n")
+            with span("build_toc.write_json"):
+                table_of_contents.write_json(file)
+        os.replace(temp_filepath, filepath)
+    except Exception as e:
+        # Any error, e.g. from a class that can't be inspected, falls back to building the JSON in memory
+        unreal.log_warning(f"Failed to write the documentation table of contents cache: {e}")
+        return False
+    finally:
+        if os.path.isfile(temp_filepath):
+            try:
+                os.remove(temp_filepath)
+            except OSError:
+                pass
+
+    return True
+
+
+def get_table_of_content_json(use_cache: bool = True):
+    if use_cache:
+        cache_filepath = get_cache_filepath()
+        with warnings.catch_warnings(), span("build_toc.cache_key"):
+            warnings.simplefilter("ignore")
+            cache_key = get_cache_key()
+
+        with span("build_toc.read_cache"):
+            cached_toc_json = read_cache(cache_filepath, cache_key)
+        if cached_toc_json is not None:
+            return cached_toc_json
 
-def get_table_of_content_json():
     table_of_contents = TableOfContents()
     with warnings.catch_warnings():
         # Suppress warnings about deprecated classes
         warnings.simplefilter("ignore")
-        table_of_contents.load()
+        with span("build_toc.load"):
+            table_of_contents.load()
+
+        # Stream the JSON straight into the cache file and read it back, so the nested dict of the entire table of contents
+        # is never created and the JSON is only built once as a single string
+        if use_cache:
+            with span("build_toc.write_cache"):
+                if write_cache(cache_filepath, cache_key, table_of_contents):
+                    toc_json = read_cache(cache_filepath, cache_key)
+                    if toc_json is not None:
+                        return toc_json
+
+        # The cache couldn't be written, build the JSON in memory instead
+        buffer = io.StringIO()
+        with span("build_toc.write_json"):
+            table_of_contents.write_json(buffer)
 
-    # Use separators withouth spaces to reduce the size of the JSON object
-    return json.dumps(table_of_contents.get_dict(), separators=(',', ':'))
+    return buffer.getvalue()
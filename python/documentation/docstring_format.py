@@ -0,0 +1,138 @@
+"""
+Formatting of the raw docstrings of the Unreal Python API into documentation pages.
+Only works on strings extracted from the `unreal` module by `get_page_content.py`, without importing `unreal` itself.
+"""
+from __future__ import annotations
+
+import re
+
+
+class EMemberType:
+    PROPERTY = "Properties"
+    METHOD = "Methods"
+    DECORATOR = "Decorators"
+
+
+class EMemberKind:
+    """ What a member is, determined from the member object before its docstring is formatted """
+    PROPERTY = "property"
+    METHOD = "method"
+    ENUM_VALUE = "enum_value"
+    FUNCTION = "function"
+    OTHER = "other"
+
+
+MEMBER_KIND_TYPES = {
+    EMemberKind.PROPERTY: EMemberType.PROPERTY,
+    EMemberKind.METHOD: EMemberType.METHOD,
+    EMemberKind.ENUM_VALUE: EMemberType.PROPERTY,
+    EMemberKind.FUNCTION: EMemberType.DECORATOR,
+    EMemberKind.OTHER: None,
+}
+
+DEFAULT_DICT_LAYOUT = {
+    EMemberType.PROPERTY: [],
+    EMemberType.METHOD: [],
+    EMemberType.DECORATOR: []
+}
+
+# Regex pattern that matches "(X): [X] X:", used for property docstrings
+PROPERTY_DOCSTRING_PATTERN = re.compile(r"\(*.+\):  \[[^\]]+\] [^\)]+[\:]?")
+
+# Regex pattern that matches "abc.X(X) -> X ", where X is any character, used for function docstrings
+FUNCTION_DOCSTRING_PATTERN = re.compile(r"^[Xx].+\(*\)\s*->\s*[\w\,]*\s*(or None)?")
+
+
+def format_docstring(doc_string: str | None, object_name: str, is_class: bool) -> str | None:
+    def _patch_line(line: str, index: int):
+        line = line.rstrip()
+
+        # Special cases for the first line
+        if index == 0:
+
+            # For classes, if docstring starts with just the class name, remove it
+            if is_class:
+                name_comparison = object_name.replace("_", "").lower()
+                line_comparison = line.replace(" ", "").lower()
+                if line_comparison == name_comparison or line_comparison[1:] == name_comparison:
+                    return ""
+
+            else:  # TODO: Spesifically check function/property
+                matches = PROPERTY_DOCSTRING_PATTERN.findall(line)
+                if matches:
+                    matching_text: str = matches[0]
+                    var_type, _, permission = matching_text.partition(":")
+                    permission = permission.rpartition("]")[0].strip("[ ")
+                    end_sign = ":" if matching_text.endswith(":") else ""
+                    line = f"{var_type} [_{permission}_]{end_sign} {line.replace(matching_text, '')}"
+
+        # Add a new line before the C++ Source
+        if is_class and "**C++ Source:" in line:
+            line = line.replace("**C++ Source:", "\n**C++ Source:")
+
+        if line.startswith("    "):
+            line = f"- {line.strip().rstrip(':')}"
+
+        return line
+
+    if doc_string and "\n" in doc_string:
+        lines = []
+        for index, line in enumerate(doc_string.split("\n")):
+            line = _patch_line(line, index)
+            if not line:
+                continue
+
+            # Break before it list's all each class member
+            if is_class and line.startswith("**Editor Properties"):
+                break
+
+            lines.append(line)
+
+        doc_string = "\n".join(lines)
+
+    elif doc_string:
+        doc_string = _patch_line(doc_string, 0).strip()
+
+    return doc_string
+
+
+def patch_method_name_and_doc(name: str, doc: str) -> tuple[str, str, str]:
+    name_hints = ""
+
+    if "--" in doc:
+        name, _, doc = doc.partition("--")
+        if "(" in name:
+            name, delimiter, name_hints = name.partition("(")
+            name_hints = delimiter + name_hints  # re-append the delimiter
+    else:
+        match = FUNCTION_DOCSTRING_PATTERN.match(doc)
+        if match:
+            matching_text: str = doc[match.start():match.end()]
+            _, delimiter, name_hints = matching_text.partition("(")
+            name_hints = delimiter + name_hints
+            doc = doc[match.end():]
+
+    return name, name_hints, doc
+
+
+def format_member(kind: str, name: str, doc: str | None, is_class: bool) -> tuple[str, dict]:
+    """
+    Format the data of a member
+    :param kind: One of `EMemberKind`
+    :param doc: The raw docstring of the member, or the value for enum values
+    :returns: The member type & the member data shown on the documentation page
+    """
+    member_type = MEMBER_KIND_TYPES[kind]
+    name_hints = ""
+    if kind != EMemberKind.ENUM_VALUE:
+        doc = format_docstring(doc, name, is_class)
+        if kind == EMemberKind.METHOD:
+            name, name_hints, doc = patch_method_name_and_doc(name, doc)
+        elif kind == EMemberKind.FUNCTION:
+            name += "()"
+
+    return member_type, {
+        "name": name.strip(),
+        "doc": doc.strip(),
+        "name_hints": name_hints.strip()
+    }
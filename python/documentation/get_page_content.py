@@ -1,135 +1,159 @@
 """ Print a JSON object with an indepth documentation for a given object """
+from __future__ import annotations
 
+import traceback
+import warnings
+import fnmatch
 import inspect
 import types
 import copy
 import json
-import re
-
-import unreal
-
-
-class EMemberType:
-    PROPERTY = "Properties"
-    METHOD = "Methods"
-    DECORATOR = "Decorators"
+import os
 
+from collections import OrderedDict
+from typing import Iterator
 
-DEFAULT_DICT_LAYOUT = {
-    EMemberType.PROPERTY: [],
-    EMemberType.METHOD: [],
-    EMemberType.DECORATOR: []
-}
+import unreal
 
-# Regex pattern that matches "(X): [X] X:", used for property docstrings
-PROPERTY_DOCSTRING_PATTERN = re.compile(r"\(*.+\):  \[[^\]]+\] [^\)]+[\:]?")
+from vscode_unreal_python.documentation.docstring_format import EMemberKind, DEFAULT_DICT_LAYOUT
+from vscode_unreal_python.documentation import docstring_format
+from vscode_unreal_python.telemetry import span, timed
 
-# Regex pattern that matches "abc.X(X) -> X ", where X is any character, used for function docstrings
-FUNCTION_DOCSTRING_PATTERN = re.compile(r"^[Xx].+\(*\)\s*->\s*[\w\,]*\s*(or None)?")
+# Written next to the generated 'unreal.py' stub file by default, see `export_documentation`
+EXPORT_FILENAME = "documentation.ndjson"
 
 
-def get_docstring(obj: object, object_name: str) -> str:
-    is_class = inspect.isclass(obj)
-
-    def _patch_line(line: str, index: int):
-        line = line.rstrip()
-
-        # Special cases for the first line
-        if index == 0:
-
-            # For classes, if docstring starts with just the class name, remove it
-            if is_class:
-                name_comparison = object_name.replace("_", "").lower()
-                line_comparison = line.replace(" ", "").lower()
-                if line_comparison == name_comparison or line_comparison[1:] == name_comparison:
-                    return ""
-
-            else:  # TODO: Spesifically check function/property
-                matches = PROPERTY_DOCSTRING_PATTERN.findall(line)
-                if matches:
-                    matching_text: str = matches[0]
-                    var_type, _, permission = matching_text.partition(":")
-                    permission = permission.rpartition("]")[0].strip("[ ")
-                    end_sign = ":" if matching_text.endswith(":") else ""
-                    line = f"{var_type} [_{permission}_]{end_sign} {line.replace(matching_text, '')}"
-
-        # Add a new line before the C++ Source
-        if is_class and "**C++ Source:" in line:
-            line = line.replace("**C++ Source:", "\n**C++ Source:")
-
-        if line.startswith("    "):
-            line = f"- {line.strip().rstrip(':')}"
-
-        return line
-
-    doc_string = obj.__doc__
-
-    if doc_string and "\n" in doc_string:
-        lines = []
-        for index, line in enumerate(doc_string.split("\n")):
-            line = _patch_line(line, index)
-            if not line:
-                continue
+class EMemberOrigin:
+    UNIQUE = "unique"
+    INHERITED = "inherited"
+    OVERRIDDEN = "overridden"
 
-            # Break before it list's all each class member
-            if is_class and line.startswith("**Editor Properties"):
-                break
 
-            lines.append(line)
+# Max number of members to keep the parsed data of in memory
+MEMBER_DATA_CACHE_SIZE = 20000
 
-        doc_string = "\n".join(lines)
+# Parsed member data, {(defining_class, member_name): (member_type, member_data)}
+# This script is only executed once per session by `vsc_eval`, so the cache is shared between pages
+MEMBER_DATA_CACHE: OrderedDict[tuple[object, str], tuple[str, dict]] = OrderedDict()
 
-    elif doc_string:
-        doc_string = _patch_line(doc_string, 0).strip()
+# Max number of classes to keep the member index of in memory
+MEMBER_INDEX_CACHE_SIZE = 2000
 
-    return doc_string
+# {class: {member_name: (defining_class, member_origin)}}
+MEMBER_INDEX_CACHE: OrderedDict[type, dict[str, tuple[type, str]]] = OrderedDict()
 
 
-def patch_method_name_and_doc(name: str, doc: str) -> tuple[str, str, str]:
-    name_hints = ""
+def get_docstring(obj: object, object_name: str) -> str:
+    return docstring_format.format_docstring(obj.__doc__, object_name, inspect.isclass(obj))
 
-    if "--" in doc:
-        name, _, doc = doc.partition("--")
-        if "(" in name:
-            name, delimiter, name_hints = name.partition("(")
-            name_hints = delimiter + name_hints  # re-append the delimiter
-    else:
-        match = FUNCTION_DOCSTRING_PATTERN.match(doc)
-        if match:
-            matching_text: str = doc[match.start():match.end()]
-            _, delimiter, name_hints = matching_text.partition("(")
-            name_hints = delimiter + name_hints
-            doc = doc[match.end():]
 
-    return name, name_hints, doc
+def get_member_kind(member: object) -> str:
+    if inspect.isgetsetdescriptor(member) or inspect.ismemberdescriptor(member):
+        return EMemberKind.PROPERTY
+    if inspect.ismethoddescriptor(member) or inspect.isbuiltin(member):
+        return EMemberKind.METHOD
+    if issubclass(type(member), unreal.EnumBase):
+        return EMemberKind.ENUM_VALUE
+    if inspect.isfunction(member):
+        return EMemberKind.FUNCTION
+    return EMemberKind.OTHER
+
+
+def extract_member(member: object, memeber_name: str) -> tuple[str, str, str | None, bool]:
+    """
+    Get everything needed to format the member, this is the only part that needs to access the unreal object
+    :returns: The arguments for `docstring_format.format_member`
+    """
+    kind = get_member_kind(member)
+    doc = str(member.value) if kind == EMemberKind.ENUM_VALUE else member.__doc__
+    return kind, memeber_name, doc, inspect.isclass(member)
 
 
 def get_member_data(member: object, memeber_name: str) -> tuple[str, dict]:
-    name = memeber_name
+    return docstring_format.format_member(*extract_member(member, memeber_name))
+
+
+def get_member_index(cls: type) -> dict[str, tuple[type, str]]:
+    """
+    Get a dict mapping each member name of the class to the class in the MRO that defines it,
+    and whether the member is unique to the class, inherited or overridden.
+    """
+    member_index = MEMBER_INDEX_CACHE.get(cls)
+    if member_index is not None:
+        MEMBER_INDEX_CACHE.move_to_end(cls)
+        return member_index
+
+    member_index = {}
+
+    # Go through the bases from the least derived, so members are mapped to the last class that (re)defines it
+    for base in reversed(cls.__mro__[1:]):
+        for member_name in base.__dict__:
+            member_index[member_name] = (base, EMemberOrigin.INHERITED)
+
+    for member_name in cls.__dict__:
+        origin = EMemberOrigin.OVERRIDDEN if member_name in member_index else EMemberOrigin.UNIQUE
+        member_index[member_name] = (cls, origin)
+
+    MEMBER_INDEX_CACHE[cls] = member_index
+    while len(MEMBER_INDEX_CACHE) > MEMBER_INDEX_CACHE_SIZE:
+        MEMBER_INDEX_CACHE.popitem(last=False)
+
+    return member_index
+
+
+def get_member_data_cached(owner: object, member: object, memeber_name: str) -> tuple[str, dict]:
+    """
+    Same as `get_member_data`, but re-uses the data if the member has been parsed before.
+    :param owner: The class defining the member, or the unreal module for functions
+    """
+    key = (owner, memeber_name)
+    cached_data = MEMBER_DATA_CACHE.get(key)
+    if cached_data is not None:
+        MEMBER_DATA_CACHE.move_to_end(key)
+        return cached_data
+
+    member_data = get_member_data(member, memeber_name)
+    cache_member_data(key, member_data)
+    return member_data
+
+
+def cache_member_data(key: tuple[object, str], member_data: tuple[str, dict]):
+    MEMBER_DATA_CACHE[key] = member_data
+    while len(MEMBER_DATA_CACHE) > MEMBER_DATA_CACHE_SIZE:
+        MEMBER_DATA_CACHE.popitem(last=False)
+
+
+def iter_object_members(ue_object: object) -> Iterator[tuple[str, object, object, str]]:
+    """
+    Iterate over the members shown on the documentation page of a class, or the functions of the unreal module
+    :returns: Iterator of (origin, owner, member, member_name) where origin is either "unique" or "inherited",
+              and owner is the class defining the member, or the unreal module for functions
+    """
+    if not inspect.isclass(ue_object):
+        for function_name, function in inspect.getmembers(unreal):
+            if isinstance(function, (types.BuiltinFunctionType, types.FunctionType)):
+                yield EMemberOrigin.UNIQUE, unreal, function, function_name
+        return
 
-    doc = get_docstring(member, memeber_name)
+    member_index = get_member_index(ue_object)
+    for memeber_name in sorted(member_index):
+        if memeber_name.startswith("_"):
+            continue
 
-    member_type = None
-    name_hints = ""
-    if inspect.isgetsetdescriptor(member) or inspect.ismemberdescriptor(member):
-        member_type = EMemberType.PROPERTY
-    elif inspect.ismethoddescriptor(member) or inspect.isbuiltin(member):
-        member_type = EMemberType.METHOD
-        name, name_hints, doc = patch_method_name_and_doc(name, doc)
-    elif issubclass(type(member), unreal.EnumBase):
-        member_type = EMemberType.PROPERTY
-        doc = str(member.value)
-    elif inspect.isfunction(member):
-        member_type = EMemberType.DECORATOR
-        name += "()"
-
-    return member_type, {
-        "name": name.strip(),
-        "doc": doc.strip(),
-        "name_hints": name_hints.strip()
-    }
+        defining_class, origin = member_index[memeber_name]
+        try:
+            member = getattr(ue_object, memeber_name)
+        except AttributeError:
+            member = defining_class.__dict__[memeber_name]
 
+        # Overridden members are listed together with the inherited members
+        if origin == EMemberOrigin.UNIQUE:
+            yield EMemberOrigin.UNIQUE, defining_class, member, memeber_name
+        else:
+            yield EMemberOrigin.INHERITED, defining_class, member, memeber_name
 
+
+@timed("get_page_content.get_object_documentation")
 def get_object_documentation(object_name: str) -> dict:
     if not hasattr(unreal, object_name):
         return None
@@ -140,51 +164,75 @@ def get_object_documentation(object_name: str) -> dict:
 
     if is_class:
         bases_names = [x.__name__ for x in ue_object.__bases__]
-
-        object_dict = ue_object.__dict__
         doc_string = get_docstring(ue_object, object_name)
-
-        inherited_members = copy.deepcopy(DEFAULT_DICT_LAYOUT)
-        unique_members = copy.deepcopy(DEFAULT_DICT_LAYOUT)
-
-        for memeber_name, member in inspect.getmembers(ue_object):
-            if memeber_name.startswith("_"):
-                continue
-
-            member_type, member_data = get_member_data(member, memeber_name)
-
-            # Check where the method/property originates from
-            #  Inherited                          Overriden
-            if memeber_name not in object_dict or any(hasattr(x, memeber_name) for x in ue_object.__bases__):
-                inherited_members[member_type].append(member_data)
-            else:
-                # Unique
-                unique_members[member_type].append(member_data)
     else:
         object_name = "Unreal Functions"
         doc_string = get_docstring(unreal, object_name)
         bases_names = []
-        inherited_members = copy.deepcopy(DEFAULT_DICT_LAYOUT)
-        unique_members = copy.deepcopy(DEFAULT_DICT_LAYOUT)
-        for function_name, function in inspect.getmembers(unreal):
-            if not isinstance(function, (types.BuiltinFunctionType, types.FunctionType)):
-                continue
 
-            member_type, member_data = get_member_data(function, function_name)
-            unique_members[member_type].append(member_data)
+    members = {
+        EMemberOrigin.INHERITED: copy.deepcopy(DEFAULT_DICT_LAYOUT),
+        EMemberOrigin.UNIQUE: copy.deepcopy(DEFAULT_DICT_LAYOUT)
+    }
+    for origin, owner, member, memeber_name in iter_object_members(ue_object):
+        member_type, member_data = get_member_data_cached(owner, member, memeber_name)
+        members[origin][member_type].append(member_data)
 
     return {
         "name": object_name,
         "doc": doc_string,
         "bases": bases_names,
-        "members": {
-            "inherited": inherited_members,
-            "unique": unique_members
-        },
+        "members": members,
         "is_class": is_class
     }
 
 
 def get_object_documentation_json(object_name: str) -> str:
     data = get_object_documentation(object_name)
-    return json.dumps(data, separators=(",", ":"))
+    with span("get_page_content.serialize"):
+        return json.dumps(data, separators=(",", ":"))
+
+
+def export_documentation(pattern: str = "*", include_functions: bool = True, output_file: str | None = None) -> str:
+    """
+    Write the documentation of all classes matching `pattern` to a file, e.g. for offline browsing or to feed other tools.
+    Not called by the extension itself, it's meant to be run from Unreal's Python console or a script.
+    Each line in the file is the JSON documentation of one object, written as soon as it's generated.
+    :param pattern: Unix shell-style wildcard pattern matched against the class names _(case-insensitive)_
+    :param include_functions: Also export the page containing all of the unreal module's functions
+    :param output_file: The file to write, defaults to `EXPORT_FILENAME` in the project's 'Intermediate/PythonStub' folder
+    :returns: A JSON object with the filepath and the number of objects exported/failed
+    """
+    pattern = pattern.lower()
+    object_names = [name for name, obj in vars(unreal).items()
+                    if inspect.isclass(obj) and fnmatch.fnmatchcase(name.lower(), pattern)]
+    object_names.sort()
+
+    if include_functions:
+        function_name = next((name for name, obj in vars(unreal).items()
+                              if isinstance(obj, (types.BuiltinFunctionType, types.FunctionType))), None)
+        if function_name:
+            object_names.append(function_name)
+
+    filepath = output_file or os.path.join(os.path.abspath(unreal.Paths.project_intermediate_dir()), "PythonStub", EXPORT_FILENAME)
+    os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+
+    num_objects = 0
+    num_failed = 0
+    with open(filepath, 'w', encoding="utf-8") as file, warnings.catch_warnings():
+        # Suppress warnings about deprecated classes
+        warnings.simplefilter("ignore")
+
+        for object_name in object_names:
+            try:
+                data = get_object_documentation(object_name)
+            except Exception:
+                unreal.log_warning(f"Failed to generate documentation for '{object_name}':\n{traceback.format_exc()}")
+                num_failed += 1
+                continue
+
+            file.write(json.dumps(data, separators=(",", ":")))
+            file.write("\n")
+            num_objects += 1
+
+    return json.dumps({"filepath": filepath, "num_objects": num_objects, "num_failed": num_failed})
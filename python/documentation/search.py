@@ -0,0 +1,256 @@
+"""
+Full-text search over the Unreal Engine Python API.
+
+Builds an inverted index over the class names, member names and docstrings in the unreal module,
+names are split on CamelCase & snake_case so e.g. "spawn actor" matches `EditorActorSubsystem.spawn_actor_from_class`.
+The index is built a slice at a time on each editor tick, so building it doesn't freeze the editor.
+"""
+from __future__ import annotations
+
+import traceback
+import warnings
+import inspect
+import bisect
+import types
+import array
+import time
+import json
+import re
+
+from typing import Iterator
+
+import unreal
+
+from vscode_unreal_python.documentation.build_toc import get_cache_key
+
+# Splits e.g. "HTTPRequest_spawnActor2" into ["HTTP", "Request", "spawn", "Actor", "2"]
+TOKEN_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+# Common words in the docstrings that aren't worth indexing
+STOP_WORDS = frozenset((
+    "the", "and", "for", "this", "that", "with", "from", "are", "can", "will", "not", "args",
+    "returns", "return", "none", "true", "false", "source", "module", "file", "editor", "properties"
+))
+
+# Max number of tokens a query term may expand to through prefix matching
+MAX_PREFIX_EXPANSIONS = 200
+
+# Queries shorter than this match too many tokens by prefix to be useful
+MIN_QUERY_LENGTH = 3
+
+# Max number of seconds spent building the index on each editor tick
+INDEX_TICK_BUDGET = 0.005
+
+# Min number of seconds between each check whether the unreal module has changed since the index was built
+OUTDATED_CHECK_INTERVAL = 10.0
+
+NAME_WEIGHT = 4.0
+MEMBER_NAME_WEIGHT = 3.0
+DOC_WEIGHT = 0.5
+PREFIX_MATCH_FACTOR = 0.6
+EXACT_NAME_BONUS = 4.0
+
+
+def tokenize(text: str) -> list[str]:
+    return [token.lower() for token in TOKEN_PATTERN.findall(text)]
+
+
+class SearchIndex:
+    """ Inverted index over the unreal module, mapping each token to the ids of the entries containing it """
+
+    def __init__(self, cache_key: str):
+        """ :param cache_key: The `build_toc.get_cache_key` of the unreal module the index is built from """
+        self.cache_key = cache_key
+        self.last_check_time = time.perf_counter()
+
+        # Each entry is a (object_name, member_name) tuple, member_name is None for classes/functions
+        self.entries: list[tuple[str, str | None]] = []
+
+        self.name_postings: dict[str, array.array] = {}
+        self.doc_postings: dict[str, array.array] = {}
+
+        self.sorted_tokens: list[str] = []
+
+    def add_entry(self, object_name: str, member_name: str | None, doc: str | None):
+        entry_id = len(self.entries)
+        self.entries.append((object_name, member_name))
+
+        for token in set(tokenize(member_name or object_name)):
+            self.name_postings.setdefault(token, array.array("i")).append(entry_id)
+
+        if doc:
+            for token in set(tokenize(doc)):
+                if len(token) > 2 and token not in STOP_WORDS:
+                    self.doc_postings.setdefault(token, array.array("i")).append(entry_id)
+
+    def iter_load(self, include_docstrings: bool = True) -> Iterator[None]:
+        """ Add the objects in the unreal module to the index, yielding after each object so the work can be spread over several ticks """
+        for object_name, obj in sorted(vars(unreal).items()):
+            if object_name.startswith("_"):
+                continue
+
+            if inspect.isclass(obj):
+                self.add_entry(object_name, None, obj.__doc__ if include_docstrings else None)
+
+                for member_name, member in sorted(obj.__dict__.items()):
+                    if member_name.startswith("_"):
+                        continue
+
+                    doc = getattr(member, "__doc__", None) if include_docstrings else None
+                    self.add_entry(object_name, member_name, doc if isinstance(doc, str) else None)
+
+            elif isinstance(obj, (types.BuiltinFunctionType, types.FunctionType)):
+                self.add_entry(object_name, None, obj.__doc__ if include_docstrings else None)
+
+            yield
+
+        self.sorted_tokens = sorted(self.name_postings.keys() | self.doc_postings.keys())
+
+    def is_outdated(self) -> bool:
+        """ Check if the unreal module has changed since the index was built, e.g. a plugin being enabled or disabled """
+        if time.perf_counter() - self.last_check_time < OUTDATED_CHECK_INTERVAL:
+            return False
+
+        self.last_check_time = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return get_cache_key() != self.cache_key
+
+    def get_matching_tokens(self, term: str) -> list[str]:
+        """ Get all indexed tokens starting with `term` """
+        start = bisect.bisect_left(self.sorted_tokens, term)
+        end = bisect.bisect_left(self.sorted_tokens, term + "\uffff", start)
+        return self.sorted_tokens[start:min(end, start + MAX_PREFIX_EXPANSIONS)]
+
+    def score_term(self, term: str) -> dict[int, float]:
+        """ Get the score of each entry matching the query term, prefix matches are scored lower than exact matches """
+        scores: dict[int, float] = {}
+        for token in self.get_matching_tokens(term):
+            factor = 1.0 if token == term else PREFIX_MATCH_FACTOR
+
+            for postings, weight in ((self.name_postings.get(token), None), (self.doc_postings.get(token), DOC_WEIGHT)):
+                if not postings:
+                    continue
+
+                for entry_id in postings:
+                    if weight is None:
+                        entry_weight = NAME_WEIGHT if self.entries[entry_id][1] is None else MEMBER_NAME_WEIGHT
+                    else:
+                        entry_weight = weight
+
+                    score = entry_weight * factor
+                    if score > scores.get(entry_id, 0.0):
+                        scores[entry_id] = score
+
+        return scores
+
+    def search(self, query: str, limit: int = 50) -> list[dict]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        # All terms must match, start with the term matching the fewest entries
+        term_scores = sorted((self.score_term(term) for term in set(terms)), key=len)
+        scores = term_scores[0]
+        for other_scores in term_scores[1:]:
+            scores = {entry_id: score + other_scores[entry_id] for entry_id, score in scores.items() if entry_id in other_scores}
+
+        # Bonus for entries where the name matches the query exactly (ignoring case & underscores)
+        query_name = "".join(terms)
+        results = []
+        for entry_id, score in scores.items():
+            object_name, member_name = self.entries[entry_id]
+            name = member_name or object_name
+            if name.replace("_", "").lower() == query_name:
+                score += EXACT_NAME_BONUS
+            results.append((-score, len(name), name, entry_id))
+
+        results.sort()
+
+        return [
+            {
+                "object": self.entries[entry_id][0],
+                "member": self.entries[entry_id][1],
+                "score": round(-negative_score, 3)
+            }
+            for negative_score, _, _, entry_id in results[:limit]
+        ]
+
+
+class SearchIndexBuilder:
+    """ Builds a search index a slice of `INDEX_TICK_BUDGET` at a time on each editor tick """
+
+    def __init__(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.index = SearchIndex(get_cache_key())
+
+        self.routine = self.index.iter_load()
+        self.is_finished = False
+        self.has_failed = False
+        self.callback_handle = unreal.register_slate_post_tick_callback(self.tick)
+
+    def tick(self, delta_seconds: float):
+        if self.is_finished:
+            return
+
+        deadline = time.perf_counter() + INDEX_TICK_BUDGET
+        with warnings.catch_warnings():
+            # Suppress warnings about deprecated classes
+            warnings.simplefilter("ignore")
+            try:
+                for _ in self.routine:
+                    if time.perf_counter() >= deadline:
+                        return
+            except Exception:
+                unreal.log_error(f"Failed to build the documentation search index:\n{traceback.format_exc()}")
+                self.has_failed = True
+
+        self.is_finished = True
+        unreal.unregister_slate_post_tick_callback(self.callback_handle)
+
+
+# This script is only executed once per session by `vsc_eval`, so the index is kept between searches
+SEARCH_INDEX: SearchIndex | None = None
+SEARCH_INDEX_BUILDER: SearchIndexBuilder | None = None
+
+
+def get_search_index() -> SearchIndex | None:
+    """
+    Get the search index, starts building it over the next editor ticks if it doesn't exist yet or is outdated
+    :returns: The index, or None if it's still being built. An outdated index keeps being used while the new one is built
+    """
+    global SEARCH_INDEX, SEARCH_INDEX_BUILDER
+    if SEARCH_INDEX_BUILDER and SEARCH_INDEX_BUILDER.is_finished:
+        if not SEARCH_INDEX_BUILDER.has_failed:
+            SEARCH_INDEX = SEARCH_INDEX_BUILDER.index
+        SEARCH_INDEX_BUILDER = None
+
+    if SEARCH_INDEX_BUILDER is None and (SEARCH_INDEX is None or SEARCH_INDEX.is_outdated()):
+        SEARCH_INDEX_BUILDER = SearchIndexBuilder()
+
+    return SEARCH_INDEX
+
+
+def prepare_search_index() -> bool:
+    """
+    Start building the search index, called when the documentation panel has loaded the table of contents
+    :returns: True if the index is ready
+    """
+    return get_search_index() is not None
+
+
+def search(query: str, limit: int = 50) -> str:
+    """
+    Search the Unreal Python API
+    :returns: A JSON object {"ready": bool, "results": [...]}, where results are the best matching classes/functions/members sorted by relevance.
+              ready is False while the index is being built, the results are then empty
+    """
+    if len(query.strip()) < MIN_QUERY_LENGTH:
+        return json.dumps({"ready": True, "results": []})
+
+    search_index = get_search_index()
+    if search_index is None:
+        return json.dumps({"ready": False, "results": []})
+
+    return json.dumps({"ready": True, "results": search_index.search(query, limit)}, separators=(",", ":"))
@@ -5,72 +5,718 @@ This script will be called from 'vscode_execute_entry.py' and will execute the u
 """
 
 import traceback
+import threading
+import itertools
 import tempfile
+import hashlib
+import inspect
 import logging
+import pstats
+import types
+import time
+import json
+import uuid
 import ast
 import sys
 import os
+import gc
 
+from collections import OrderedDict
 from contextlib import nullcontext
 
 import unreal
 
+from vscode_unreal_python.path_index import SYS_PATH_INDEX
+from vscode_unreal_python.telemetry import span, timed
+
 TEMP_FOLDERPATH = os.path.join(tempfile.gettempdir(), "VSCode-Unreal-Python")
-OUTPUT_FILENAME = "exec-out"
+PROFILE_STACKS_FILENAME = "exec-profile.folded"
 
 DATA_FILEPATH_GLOBAL_VAR_NAME = "data_filepath"
 
+# Max number of compiled scripts to keep in memory
+CODE_CACHE_SIZE = 16
+
+# Variable the last expression is assigned to when executing tick sliced, see `assign_last_expr`.
+# The last expression is also assigned to `_`, the same as when it's printed by `add_print_for_last_expr`
+LAST_EXPR_VAR_NAME = "__VsCodeLastExpr__"
+
+# Max number of finished tick tasks to keep, so their status can still be queried
+MAX_FINISHED_TICK_TASKS = 16
+
+# Session used when no session name is given, its namespace is the `__VsCodeVariables__` global for backwards compatibility
+DEFAULT_SESSION_NAME = "default"
+
+# Max number of objects to visit when approximating the size of a session, so measuring a huge namespace doesn't stall the editor
+MAX_SIZE_OBJECTS = 200000
+
+# Number of items measured in large containers, the size of the remaining items is extrapolated from these
+SIZE_SAMPLE_COUNT = 1000
+
+# Objects shared with the rest of the interpreter, that aren't counted towards the size of a session
+SIZE_IGNORED_TYPES = (types.ModuleType, type, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
 
 class UnrealLogRedirectDebugging:
     """ 
-    Re-directs the Unreal log functions so that they are printed to python's stdout and can be read by the debugger
+    Re-directs the Unreal log functions so that they are printed to python's stdout and can be read by the debugger.
+    Messages are buffered and written in batches, as each write is sent over the debugger connection.
+    Identical consecutive messages are collapsed into a single line, and messages exceeding the rate limit are dropped.
+    The buffer is flushed every `flush_interval` by a background thread, so messages logged right before a breakpoint,
+    a blocking call or a long computation still show up, and when exiting the context.
     """
 
-    def __init__(self):
+    LOG = "log"
+    WARNING = "warning"
+    ERROR = "error"
+
+    def __init__(self, flush_interval: float = 0.1, rate_limit: int = 1000):
+        """
+        :param flush_interval: Number of seconds between each write of the buffered messages
+        :param rate_limit: Max number of messages per second for each log level, 0 disables the rate limit
+        """
         self.logger = logging.getLogger("Unreal")
+        self.flush_interval = flush_interval
+        self.rate_limit = rate_limit
+
+        # Buffered messages as [level, message, count] lists, `count` is incremented for repeated messages
+        self.buffer: list[list] = []
+        self.last_flush_time = time.perf_counter()
+
+        # The buffer is written from both the thread running the code & the flush thread
+        self.lock = threading.Lock()
+        self.flush_thread: threading.Thread | None = None
+        self.stop_event = threading.Event()
+
+        # Number of messages in the current one second window, and messages dropped since last reported, for each level
+        self.window_start_time = self.last_flush_time
+        self.window_counts = dict.fromkeys((self.LOG, self.WARNING, self.ERROR), 0)
+        self.num_dropped = dict.fromkeys((self.LOG, self.WARNING, self.ERROR), 0)
+
         self.original_log = unreal.log
         self.original_log_error = unreal.log_error
         self.original_log_warning = unreal.log_warning
 
+    def add_message(self, level: str, msg: str):
+        msg = str(msg)
+        with self.lock:
+            self.add_message_locked(level, msg)
+
+        if time.perf_counter() - self.last_flush_time >= self.flush_interval:
+            self.flush()
+
+    def add_message_locked(self, level: str, msg: str):
+        if self.buffer and self.buffer[-1][0] == level and self.buffer[-1][1] == msg:
+            self.buffer[-1][2] += 1
+        else:
+            current_time = time.perf_counter()
+            if current_time - self.window_start_time >= 1.0:
+                self.window_start_time = current_time
+                self.window_counts = dict.fromkeys(self.window_counts, 0)
+
+            if self.rate_limit and self.window_counts[level] >= self.rate_limit:
+                self.num_dropped[level] += 1
+            else:
+                self.window_counts[level] += 1
+                self.buffer.append([level, msg, 1])
+
+    def write(self, level: str, lines: list[str]):
+        text = "\n".join(lines)
+        if level == self.ERROR:
+            self.logger.error(text)
+        elif level == self.WARNING:
+            self.logger.warning(text)
+        else:
+            print(text)
+
+    def flush(self):
+        """ Write the buffered messages, consecutive messages of the same level are written in a single call """
+        with self.lock:
+            self.flush_locked()
+
+    def flush_loop(self):
+        while not self.stop_event.wait(self.flush_interval):
+            if self.buffer or any(self.num_dropped.values()):
+                self.flush()
+
+    def flush_locked(self):
+        self.last_flush_time = time.perf_counter()
+
+        dropped = [f"{num} {level}" for level, num in self.num_dropped.items() if num]
+        if dropped:
+            self.buffer.append([self.WARNING, f"Dropped {', '.join(dropped)} messages, exceeding the rate limit of {self.rate_limit} messages per second", 1])
+            self.num_dropped = dict.fromkeys(self.num_dropped, 0)
+
+        level = None
+        lines: list[str] = []
+        for message_level, msg, count in self.buffer:
+            if message_level != level and lines:
+                self.write(level, lines)
+                lines = []
+
+            level = message_level
+            lines.append(f"{msg} (repeated {count} times)" if count > 1 else msg)
+
+        if lines:
+            self.write(level, lines)
+
+        self.buffer.clear()
+
     def redirect_warning(self, msg: str):
-        self.logger.warning(msg)
+        self.add_message(self.WARNING, msg)
 
     def redirect_error(self, msg: str):
-        self.logger.error(msg)
+        self.add_message(self.ERROR, msg)
 
     def redirect(self, msg: str):
-        print(msg)
+        self.add_message(self.LOG, msg)
 
     def __enter__(self):
+        self.original_log = unreal.log
+        self.original_log_error = unreal.log_error
+        self.original_log_warning = unreal.log_warning
+
         unreal.log = self.redirect
         unreal.log_error = self.redirect_error
         unreal.log_warning = self.redirect_warning
 
+        self.stop_event.clear()
+        self.flush_thread = threading.Thread(target=self.flush_loop, name="VsCodeLogRedirectFlush", daemon=True)
+
+        # Tells debugpy this is one of its own threads, so it isn't paused along with the code at a breakpoint
+        self.flush_thread.is_pydev_daemon_thread = True
+        self.flush_thread.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.flush_thread:
+            self.stop_event.set()
+            self.flush_thread.join()
+            self.flush_thread = None
+
+        self.flush()
+
+        unreal.log = self.original_log
+        unreal.log_error = self.original_log_error
+        unreal.log_warning = self.original_log_warning
+
+
+class OutputStream:
+    """
+    Tees stdout, stderr & the Unreal log functions into an append-only file, so VS Code can tail the output while the code is running.
+    The file is line buffered, so each line is available to VS Code as soon as it's written and no output is held in memory.
+    """
+
+    class TeeStream:
+        def __init__(self, stream, file):
+            self.stream = stream
+            self.file = file
+
+        def write(self, text: str):
+            self.file.write(text)
+            return self.stream.write(text)
+
+        def flush(self):
+            self.file.flush()
+            self.stream.flush()
+
+        def __getattr__(self, name: str):
+            return getattr(self.stream, name)
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.file = None
+
+        self.original_stdout = sys.stdout
+        self.original_stderr = sys.stderr
+        self.original_log = unreal.log
+        self.original_log_error = unreal.log_error
+        self.original_log_warning = unreal.log_warning
+
+    def tee_log(self, log_function):
+        def log(msg):
+            self.file.write(f"{msg}\n")
+            log_function(msg)
+        return log
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        self.file = open(self.filepath, 'a', encoding="utf-8", errors="backslashreplace", buffering=1)
+
+        sys.stdout = self.TeeStream(self.original_stdout, self.file)
+        sys.stderr = self.TeeStream(self.original_stderr, self.file)
+        unreal.log = self.tee_log(self.original_log)
+        unreal.log_error = self.tee_log(self.original_log_error)
+        unreal.log_warning = self.tee_log(self.original_log_warning)
+
     def __exit__(self, exc_type, exc_val, exc_tb):
+        sys.stdout = self.original_stdout
+        sys.stderr = self.original_stderr
         unreal.log = self.original_log
         unreal.log_error = self.original_log_error
         unreal.log_warning = self.original_log_warning
 
+        self.file.close()
+
+
+class DeterministicProfiler:
+    """
+    Profiles the executed code using cProfile, recording every function call
+    """
+    mode = "deterministic"
+
+    def __init__(self):
+        import cProfile
+        self.profiler = cProfile.Profile()
+        self.total_time = 0.0
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        self.profiler.enable()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.profiler.disable()
+        self.total_time = time.perf_counter() - self.start_time
+
+    def get_report(self, num_functions: int) -> dict:
+        stats = pstats.Stats(self.profiler).stats
+
+        functions = []
+        for (filename, lineno, function_name), (_, num_calls, self_time, cumulative_time, _) in stats.items():
+            functions.append({
+                "name": f"{function_name} ({filename}:{lineno})" if lineno else function_name,
+                "calls": num_calls,
+                "self_time": round(self_time * 1000, 3),
+                "cumulative_time": round(cumulative_time * 1000, 3)
+            })
+
+        functions.sort(key=lambda x: x["cumulative_time"], reverse=True)
+
+        return {
+            "mode": self.mode,
+            "total_time": round(self.total_time * 1000, 3),
+            "functions": functions[:num_functions],
+            "collapsed_stacks_filepath": None
+        }
+
+
+class SamplingProfiler:
+    """
+    Profiles the executed code by periodically sampling the call stack of the executing thread from a background thread.
+    Has a lower overhead than the deterministic profiler, and also writes the collapsed stacks to a file that can be
+    used to generate a flame graph.
+    """
+    mode = "sampling"
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks: dict[tuple[str, ...], int] = {}
+        self.num_samples = 0
+        self.total_time = 0.0
+
+        self.thread_id = threading.get_ident()
+        # Only include the frames of the executed code, not the frames of this script
+        self.stop_code = sys._getframe(1).f_code
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.sample, name="VSCodeSamplingProfiler", daemon=True)
+
+    def sample(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+
+            stack = []
+            while frame is not None and frame.f_code is not self.stop_code:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+
+            if frame is None or not stack:
+                continue
+
+            stack_key = tuple(reversed(stack))
+            self.stacks[stack_key] = self.stacks.get(stack_key, 0) + 1
+            self.num_samples += 1
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        self.thread.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop_event.set()
+        self.thread.join()
+        self.total_time = time.perf_counter() - self.start_time
+
+    def write_collapsed_stacks(self) -> str:
+        """ Write the stacks in the collapsed format used by e.g. flamegraph.pl & speedscope """
+        os.makedirs(TEMP_FOLDERPATH, exist_ok=True)
+        filepath = os.path.join(TEMP_FOLDERPATH, PROFILE_STACKS_FILENAME)
+        with open(filepath, 'w', encoding="utf-8") as file:
+            for stack, num_samples in self.stacks.items():
+                file.write(f"{';'.join(frame.replace(';', ':') for frame in stack)} {num_samples}\n")
+        return filepath
+
+    def get_report(self, num_functions: int) -> dict:
+        # Estimate the time spent in each function based on the number of samples it was part of
+        time_per_sample = self.total_time / self.num_samples if self.num_samples else 0.0
+
+        self_samples: dict[str, int] = {}
+        cumulative_samples: dict[str, int] = {}
+        for stack, num_samples in self.stacks.items():
+            self_samples[stack[-1]] = self_samples.get(stack[-1], 0) + num_samples
+            for function_name in set(stack):
+                cumulative_samples[function_name] = cumulative_samples.get(function_name, 0) + num_samples
+
+        functions = [
+            {
+                "name": function_name,
+                "calls": None,
+                "self_time": round(self_samples.get(function_name, 0) * time_per_sample * 1000, 3),
+                "cumulative_time": round(num_samples * time_per_sample * 1000, 3)
+            }
+            for function_name, num_samples in cumulative_samples.items()
+        ]
+        functions.sort(key=lambda x: x["cumulative_time"], reverse=True)
+
+        return {
+            "mode": self.mode,
+            "total_time": round(self.total_time * 1000, 3),
+            "num_samples": self.num_samples,
+            "functions": functions[:num_functions],
+            "collapsed_stacks_filepath": self.write_collapsed_stacks()
+        }
+
+
+class ETickTaskState:
+    RUNNING = "running"
+    FINISHED = "finished"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
 
-def get_exec_globals() -> dict:
+
+class TickTask:
+    """
+    Drives a generator or coroutine returned by the executed code across editor ticks, so the editor stays responsive.
+    Each tick the generator/coroutine is resumed until it has run for `tick_budget` seconds, and then continues next tick.
+    Coroutines are only resumed by this task, so they may only await objects that yield to it, e.g. `asyncio.sleep(0)`.
+    """
+
+    def __init__(self, routine, filename: str, code: str, tick_budget: float,
+                 output_filepath: str | None = None, log_redirect: UnrealLogRedirectDebugging | None = None):
+        self.id = str(uuid.uuid4())
+        self.name = getattr(routine, "__qualname__", type(routine).__name__)
+        self.routine = routine
+        self.filename = filename
+        self.code = code
+        self.tick_budget = tick_budget
+        self.output_filepath = output_filepath
+        self.log_redirect = log_redirect
+
+        self.state = ETickTaskState.RUNNING
+        self.num_ticks = 0
+        self.num_steps = 0
+        self.active_time = 0.0
+        self.start_time = time.perf_counter()
+        self.end_time = None
+
+        self.callback_handle = unreal.register_slate_post_tick_callback(self.tick)
+
+    def tick(self, delta_seconds: float):
+        if self.state != ETickTaskState.RUNNING:
+            return
+
+        self.num_ticks += 1
+        tick_start_time = time.perf_counter()
+        deadline = tick_start_time + self.tick_budget
+
+        with OutputStream(self.output_filepath) if self.output_filepath else nullcontext(), \
+                self.log_redirect or nullcontext():
+            try:
+                while True:
+                    self.routine.send(None)
+                    self.num_steps += 1
+                    if time.perf_counter() >= deadline:
+                        break
+            except StopIteration:
+                self.finish(ETickTaskState.FINISHED)
+            except Exception as e:
+                unreal.log_error(format_exception(e, self.filename, self.code, num_ignore_tracebacks=1))
+                self.finish(ETickTaskState.FAILED)
+
+        self.active_time += time.perf_counter() - tick_start_time
+
+    def cancel(self) -> bool:
+        """ Cancel the task, raising `GeneratorExit` inside the generator/coroutine so any `finally` blocks are run """
+        if self.state != ETickTaskState.RUNNING:
+            return False
+
+        with OutputStream(self.output_filepath) if self.output_filepath else nullcontext():
+            try:
+                self.routine.close()
+            except Exception as e:
+                unreal.log_error(format_exception(e, self.filename, self.code, num_ignore_tracebacks=1))
+
+        self.finish(ETickTaskState.CANCELLED)
+        return True
+
+    def finish(self, state: str):
+        self.state = state
+        self.end_time = time.perf_counter()
+        unreal.unregister_slate_post_tick_callback(self.callback_handle)
+
+    def get_status(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "state": self.state,
+            "num_ticks": self.num_ticks,
+            "num_steps": self.num_steps,
+            "active_time": round(self.active_time * 1000, 3),
+            "total_time": round(((self.end_time or time.perf_counter()) - self.start_time) * 1000, 3)
+        }
+
+
+PROFILERS = {
+    DeterministicProfiler.mode: DeterministicProfiler,
+    SamplingProfiler.mode: SamplingProfiler,
+}
+
+
+def get_approximate_size(obj, seen: set[int]) -> int:
+    """
+    Approximate the memory retained by an object, by following containers & instance dicts.
+    Objects in `seen` are skipped, so objects referenced by several variables are only counted once.
+    Memory owned by Unreal, e.g. the assets an `unreal.Object` refers to, isn't included.
+    """
+    size = 0
+    stack = [obj]
+    while stack and len(seen) < MAX_SIZE_OBJECTS:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SIZE_IGNORED_TYPES):
+            continue
+        seen.add(id(obj))
+
+        try:
+            size += sys.getsizeof(obj)
+        except TypeError:
+            continue
+
+        if isinstance(obj, (dict, list, tuple, set, frozenset)):
+            if len(obj) > SIZE_SAMPLE_COUNT:
+                sample = itertools.islice(obj.items() if isinstance(obj, dict) else obj, SIZE_SAMPLE_COUNT)
+                if isinstance(obj, dict):
+                    # Measure the keys & values, not the temporary (key, value) tuples
+                    sample = itertools.chain.from_iterable(sample)
+                sample_size = sum(get_approximate_size(item, seen) for item in sample)
+                size += sample_size * len(obj) // SIZE_SAMPLE_COUNT
+            elif isinstance(obj, dict):
+                stack.extend(obj.keys())
+                stack.extend(obj.values())
+            else:
+                stack.extend(obj)
+        else:
+            obj_dict = getattr(obj, "__dict__", None)
+            if isinstance(obj_dict, dict):
+                stack.append(obj_dict)
+
+    return size
+
+
+class ExecSession:
+    """ An isolated namespace the user scripts are executed in """
+
+    def __init__(self, name: str, variables: dict | None = None):
+        self.name = name
+        self.variables = variables if variables is not None else {"__builtins__": __builtins__, "__IsVsCodeExec__": True}
+        self.num_executions = 0
+        self.last_used_time = time.time()
+
+        # Approximate size of the variables when they were last measured, see `update_size`
+        self.size: int | None = None
+
+    def get_variable_sizes(self) -> dict[str, int]:
+        """ Get the approximate size of each user variable, objects shared between variables are counted once """
+        seen = {id(self.variables)}
+        return {
+            name: get_approximate_size(value, seen)
+            for name, value in list(self.variables.items())
+            if not (name.startswith("__") and name.endswith("__"))
+        }
+
+    def update_size(self) -> int:
+        """ Measure the approximate size of all user variables, and cache it in `size` """
+        self.size = sum(self.get_variable_sizes().values())
+        return self.size
+
+    def get_info(self, num_top_variables: int = 10) -> dict:
+        variable_sizes = self.get_variable_sizes()
+        self.size = sum(variable_sizes.values())
+        top_variables = sorted(variable_sizes.items(), key=lambda x: x[1], reverse=True)[:num_top_variables]
+        return {
+            "name": self.name,
+            "size": self.size,
+            "num_variables": len(variable_sizes),
+            "num_executions": self.num_executions,
+            "idle_time": round(time.time() - self.last_used_time, 3),
+            "top_variables": [
+                {"name": name, "type": type(self.variables.get(name)).__name__, "size": size}
+                for name, size in top_variables
+            ]
+        }
+
+
+def get_sessions() -> OrderedDict:
+    """ Get all execution sessions, ordered from least to most recently used, {name: ExecSession} """
+    if "__VsCodeSessions__" not in globals():
+        globals()["__VsCodeSessions__"] = OrderedDict()
+    return globals()["__VsCodeSessions__"]
+
+
+def get_session(name: str = DEFAULT_SESSION_NAME) -> ExecSession:
+    """ Get or create an execution session, and mark it as the most recently used """
+    sessions = get_sessions()
+    session = sessions.get(name)
+    if session is None:
+        if name == DEFAULT_SESSION_NAME:
+            if "__VsCodeVariables__" not in globals():
+                globals()["__VsCodeVariables__"] = ExecSession(name).variables
+            session = ExecSession(name, globals()["__VsCodeVariables__"])
+        else:
+            session = ExecSession(name)
+        sessions[name] = session
+
+    sessions.move_to_end(name)
+    session.last_used_time = time.time()
+    return session
+
+
+def remove_session(name: str) -> bool:
+    """
+    Remove a session, releasing its variables unless they're referenced elsewhere.
+    A tick task started in the session keeps running, as it holds its own reference to the namespace.
+    """
+    session = get_sessions().pop(name, None)
+    if session is None:
+        return False
+
+    if name == DEFAULT_SESSION_NAME:
+        globals().pop("__VsCodeVariables__", None)
+
+    return True
+
+
+def get_exec_globals(session_name: str = DEFAULT_SESSION_NAME) -> dict:
     """ Get globals to be used in the exec function when executing user scripts """
-    if "__VsCodeVariables__" not in globals():
-        globals()["__VsCodeVariables__"] = {
-            "__builtins__": __builtins__, "__IsVsCodeExec__": True}
-    return globals()["__VsCodeVariables__"]
+    return get_session(session_name).variables
+
+
+def evict_sessions(memory_budget: int, active_session_name: str) -> list[str]:
+    """
+    Remove the least recently used sessions until the total size of all sessions is within the budget.
+    The active session is never removed. Only the active session is re-measured, as the other sessions
+    haven't executed any code since their size was last measured.
+    :param memory_budget: Max total size of all sessions in bytes
+    :returns: The names of the removed sessions
+    """
+    sessions = get_sessions()
+    sizes = {
+        name: session.update_size() if name == active_session_name or session.size is None else session.size
+        for name, session in list(sessions.items())
+    }
+    total_size = sum(sizes.values())
+
+    evicted_session_names = []
+    for name in list(sessions):
+        if total_size <= memory_budget:
+            break
+
+        if name != active_session_name:
+            remove_session(name)
+            total_size -= sizes[name]
+            evicted_session_names.append(name)
+
+    if evicted_session_names:
+        gc.collect()
+        unreal.log_warning(f"Removed the idle execution session(s) {', '.join(evicted_session_names)}, "
+                           f"as all sessions exceeded the memory budget of {memory_budget / (1024 * 1024):.0f} MB")
+
+    return evicted_session_names
+
+
+def get_sessions_info(num_top_variables: int = 10) -> str:
+    """ Get the approximate size & the largest variables of each session as a JSON string, most recently used first """
+    return json.dumps([session.get_info(num_top_variables) for session in reversed(list(get_sessions().values()))])
+
+
+def reset_session(name: str = DEFAULT_SESSION_NAME) -> str:
+    """ Remove all variables of a session, returns 'true' if the session existed """
+    removed = remove_session(name)
+    if removed:
+        gc.collect()
+    return json.dumps(removed)
+
+
+def get_code_cache() -> OrderedDict:
+    """ Get the cache of compiled code objects, {(source_hash, filename, print_last_expr, capture_last_expr): code} """
+    if "__VsCodeCodeCache__" not in globals():
+        globals()["__VsCodeCodeCache__"] = OrderedDict()
+    return globals()["__VsCodeCodeCache__"]
+
+
+def get_code_cache_stats() -> dict:
+    if "__VsCodeCodeCacheStats__" not in globals():
+        globals()["__VsCodeCodeCacheStats__"] = {"hits": 0, "misses": 0}
+    return globals()["__VsCodeCodeCacheStats__"]
+
+
+def get_tick_tasks() -> OrderedDict:
+    """ Get all running & recently finished tick tasks, {task_id: TickTask} """
+    if "__VsCodeTickTasks__" not in globals():
+        globals()["__VsCodeTickTasks__"] = OrderedDict()
+    return globals()["__VsCodeTickTasks__"]
+
+
+def add_tick_task(task: TickTask):
+    tick_tasks = get_tick_tasks()
+    tick_tasks[task.id] = task
+
+    # Forget the oldest finished tasks
+    finished_task_ids = [task_id for task_id, x in tick_tasks.items() if x.state != ETickTaskState.RUNNING]
+    for task_id in finished_task_ids[:-MAX_FINISHED_TICK_TASKS]:
+        del tick_tasks[task_id]
+
+
+def get_tick_task_status(task_id: str) -> str:
+    """ Get the status of a tick task as a JSON string, or 'null' if there's no task with the given id """
+    task = get_tick_tasks().get(task_id)
+    return json.dumps(task.get_status() if task else None)
+
+
+def cancel_tick_task(task_id: str) -> str:
+    """ Cancel a running tick task, returns 'true' if the task was cancelled """
+    task = get_tick_tasks().get(task_id)
+    return json.dumps(task.cancel() if task else False)
+
+
+def list_tick_tasks() -> str:
+    """ Get the status of all running & recently finished tick tasks as a JSON string """
+    return json.dumps([task.get_status() for task in get_tick_tasks().values()])
+
+
+def get_code_cache_info() -> str:
+    """ Get the number of hits & misses of the compiled code cache as a JSON string """
+    return json.dumps({
+        **get_code_cache_stats(),
+        "size": len(get_code_cache()),
+        "max_size": CODE_CACHE_SIZE
+    })
 
 
 def find_package(filepath: str):
     """ Find the expected __package__ value for the executed file, so relative imports work """
-    normalized_filepath = os.path.normpath(filepath).lower()
-
     valid_packages = []
-    for path in sys.path:
-        normalized_path = os.path.normpath(path).lower()
-        if normalized_filepath.startswith(normalized_path):
-            package = os.path.relpath(os.path.dirname(filepath), path).replace(os.sep, ".")
-            if package != ".":
-                valid_packages.append(package)
+    for path in SYS_PATH_INDEX.find_parents(filepath):
+        package = os.path.relpath(os.path.dirname(filepath), path).replace(os.sep, ".")
+        if package != ".":
+            valid_packages.append(package)
 
     # If there are multiple valid packages, choose the shortest one
     if valid_packages:
@@ -128,6 +774,22 @@ def add_print_for_last_expr(parsed_code: ast.Module) -> ast.Module:
     return parsed_code
 
 
+def assign_last_expr(parsed_code: ast.Module) -> ast.Module:
+    """
+    Modify the ast to assign the last expression to `_` & `LAST_EXPR_VAR_NAME`, so it can be inspected after the code has been executed
+    """
+    if parsed_code.body:
+        last_expr = parsed_code.body[-1]
+        if isinstance(last_expr, ast.Expr):
+            targets = [ast.Name(id="_", ctx=ast.Store()), ast.Name(id=LAST_EXPR_VAR_NAME, ctx=ast.Store())]
+            assign = ast.Assign(targets=targets, value=last_expr.value)
+            parsed_code.body[-1] = ast.copy_location(assign, last_expr)
+            ast.fix_missing_locations(parsed_code)
+
+    return parsed_code
+
+
+@timed("execute.format_exception")
 def format_exception(exception_in: BaseException, filename: str, code: str, num_ignore_tracebacks: int = 0) -> str:
     seen_exceptions = set()
     messages = []
@@ -190,24 +852,108 @@ def format_exception(exception_in: BaseException, filename: str, code: str, num_
     return "\nDuring handling of the above exception, another exception occurred:\n\n".join(reversed(messages))
 
 
-def execute_code(code: str, filename: str):
-    try:
+def compile_code(code: str, filename: str, print_last_expr: bool = True, capture_last_expr: bool = False):
+    """
+    Parse & compile the code, re-using the code object if the same code has been compiled before
+    :param print_last_expr: Print the last expression if it isn't None, see `add_print_for_last_expr`
+    :param capture_last_expr: Assign the last expression to a variable instead of printing it, see `assign_last_expr`
+    """
+    code_cache = get_code_cache()
+    cache_stats = get_code_cache_stats()
+
+    key = (hashlib.sha1(code.encode("utf-8", "surrogatepass")).hexdigest(), filename, print_last_expr, capture_last_expr)
+    code_object = code_cache.get(key)
+    if code_object is not None:
+        code_cache.move_to_end(key)
+        cache_stats["hits"] += 1
+        return code_object
+
+    cache_stats["misses"] += 1
+
+    with span("execute.parse"):
         parsed_code = ast.parse(code, filename)
+        if capture_last_expr:
+            parsed_code = assign_last_expr(parsed_code)
+        elif print_last_expr:
+            parsed_code = add_print_for_last_expr(parsed_code)
+
+    with span("execute.compile"):
+        code_object = compile(parsed_code, filename, 'exec')
+
+    code_cache[key] = code_object
+    while len(code_cache) > CODE_CACHE_SIZE:
+        code_cache.popitem(last=False)
+
+    return code_object
+
+
+def execute_code(code: str, filename: str, profile: str | None = None, print_last_expr: bool = True,
+                 tick_budget: float | None = None, output_filepath: str | None = None,
+                 log_redirect: UnrealLogRedirectDebugging | None = None, session_name: str = DEFAULT_SESSION_NAME):
+    """
+    Execute the code
+    :param profile: Profile the execution using one of the `PROFILERS`
+    :param print_last_expr: Print the last expression if it isn't None
+    :param tick_budget: If the last expression is a generator or coroutine, drive it across editor ticks using a `TickTask`
+                        with this many seconds per tick
+    :param log_redirect: Used by the tick task to redirect the Unreal log functions while debugging
+    :param session_name: Name of the `ExecSession` to execute the code in
+    :returns: The profiler & tick task used, if any
+    """
+    capture_last_expr = tick_budget is not None
+    try:
+        code_object = compile_code(code, filename, print_last_expr, capture_last_expr)
     except (SyntaxError, ValueError) as e:
-        unreal.log_error(format_exception(e, filename, code, num_ignore_tracebacks=2))
-        return
+        # Skip all frames, as they're all from this script
+        num_ignore_tracebacks = len(traceback.extract_tb(e.__traceback__))
+        unreal.log_error(format_exception(e, filename, code, num_ignore_tracebacks=num_ignore_tracebacks))
+        return None, None
 
-    parsed_code = add_print_for_last_expr(parsed_code)
+    profiler = PROFILERS[profile]() if profile else None
+    exec_globals = get_exec_globals(session_name)
 
     try:
-        exec(compile(parsed_code, filename, 'exec'), get_exec_globals())
+        with profiler or nullcontext(), span("execute.exec"):
+            exec(code_object, exec_globals)
     except Exception as e:
         unreal.log_error(format_exception(e, filename, code, num_ignore_tracebacks=1))
+        exec_globals.pop(LAST_EXPR_VAR_NAME, None)
+        return profiler, None
+
+    tick_task = None
+    if capture_last_expr:
+        last_expr = exec_globals.pop(LAST_EXPR_VAR_NAME, None)
+        if inspect.isgenerator(last_expr) or inspect.iscoroutine(last_expr):
+            tick_task = TickTask(last_expr, filename, code, tick_budget, output_filepath, log_redirect)
+            add_tick_task(tick_task)
+        elif last_expr is not None and print_last_expr:
+            print(last_expr)
+
+    return profiler, tick_task
+
+
+def main(exec_file: str, exec_origin: str, is_debugging: bool, name_var: str | None = None,
+         profile: str | None = None, profile_num_functions: int = 30, print_last_expr: bool = True,
+         output_file: str | None = None, tick_budget: float | None = None,
+         debug_log_flush_interval: float = 0.1, debug_log_rate_limit: int = 1000,
+         session: str | None = None, session_memory_budget: float = 0):
+    """
+    :param print_last_expr: Print the last expression if it isn't None
+    :param profile: Run the code under a profiler, either "deterministic" or "sampling"
+    :param profile_num_functions: Number of functions to include in the profiling report
+    :param output_file: If set, all output is also streamed to this file, which VS Code tails while the code is running
+    :param tick_budget: Seconds per editor tick to spend on a generator or coroutine returned by the last expression, see `TickTask`
+    :param debug_log_flush_interval: When debugging, seconds between each batched write of the Unreal log messages
+    :param debug_log_rate_limit: When debugging, max number of Unreal log messages per second for each log level, 0 for no limit
+    :param session: Name of the session to execute the code in, each session has its own namespace
+    :param session_memory_budget: Max total size of all sessions in MB, idle sessions are removed when exceeded. 0 for no limit
+    :returns: A JSON string with the profiling report & the status of the started tick task, if any
+    """
+    session_name = session or DEFAULT_SESSION_NAME
+    get_session(session_name).num_executions += 1
 
-
-def main(exec_file: str, exec_origin: str, is_debugging: bool, name_var: str | None = None):
     # Set some global variables
-    exec_globals = get_exec_globals()
+    exec_globals = get_exec_globals(session_name)
 
     exec_globals["__file__"] = exec_origin
     if name_var:
@@ -217,6 +963,25 @@ def main(exec_file: str, exec_origin: str, is_debugging: bool, name_var: str | N
 
     exec_globals["__package__"] = find_package(exec_origin)
 
-    with open(exec_file, 'r', encoding="utf-8") as vscode_in_file:
-        with UnrealLogRedirectDebugging() if is_debugging else nullcontext():
-            execute_code(vscode_in_file.read(), exec_origin)
+    # The same instance is used by a started tick task, so the rate limit applies to all of its ticks
+    log_redirect = UnrealLogRedirectDebugging(debug_log_flush_interval, debug_log_rate_limit) if is_debugging else None
+
+    with span("execute.read"), open(exec_file, 'r', encoding="utf-8") as vscode_in_file:
+        code = vscode_in_file.read()
+
+    with OutputStream(output_file) if output_file else nullcontext(), \
+            log_redirect or nullcontext():
+        profiler, tick_task = execute_code(code, exec_origin, profile, print_last_expr,
+                                           tick_budget, output_file, log_redirect, session_name)
+
+    if session_memory_budget > 0:
+        with span("execute.evict_sessions"):
+            evict_sessions(int(session_memory_budget * 1024 * 1024), session_name)
+
+    if profiler or tick_task:
+        return json.dumps({
+            "profile": profiler.get_report(profile_num_functions) if profiler else None,
+            "tick_task": tick_task.get_status() if tick_task else None
+        })
+
+    return None
@@ -0,0 +1,83 @@
+"""
+Index of normalized paths, used to quickly find which of the indexed directories contains a file.
+Shared by the helper scripts, e.g. to check what's in `sys.path` without normalizing every entry on each call.
+"""
+from __future__ import annotations
+
+import sys
+import os
+
+
+def split_path(path: str) -> list[str]:
+    """ Normalize the path (case-insensitive) and split it into its components """
+    return [part for part in os.path.normpath(path).lower().split(os.sep) if part]
+
+
+class PathTrie:
+    """ Prefix tree of normalized path components """
+
+    # Key storing the original paths in the node where a path ends, can't collide with a path component
+    PATHS_KEY = None
+
+    def __init__(self, paths: list[str] | None = None):
+        self.root: dict = {}
+        for path in paths or []:
+            self.add(path)
+
+    def add(self, path: str):
+        node = self.root
+        for part in split_path(path):
+            node = node.setdefault(part, {})
+        node.setdefault(self.PATHS_KEY, []).append(path)
+
+    def __contains__(self, path: str) -> bool:
+        node = self.root
+        for part in split_path(path):
+            node = node.get(part)
+            if node is None:
+                return False
+        return self.PATHS_KEY in node
+
+    def find_parents(self, path: str) -> list[str]:
+        """ Get all indexed paths that are the given path, or one of its parent directories """
+        parents = list(self.root.get(self.PATHS_KEY, []))
+
+        node = self.root
+        for part in split_path(path):
+            node = node.get(part)
+            if node is None:
+                break
+            parents.extend(node.get(self.PATHS_KEY, []))
+
+        return parents
+
+
+class SysPathIndex:
+    """ `PathTrie` of all paths in `sys.path`, automatically rebuilt whenever `sys.path` is modified """
+
+    def __init__(self):
+        self.sys_path_snapshot: list[str] = []
+        self.trie = PathTrie()
+
+    def get_trie(self) -> PathTrie:
+        if self.sys_path_snapshot != sys.path:
+            self.sys_path_snapshot = list(sys.path)
+            self.trie = PathTrie(self.sys_path_snapshot)
+        return self.trie
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.get_trie()
+
+    def find_parents(self, path: str) -> list[str]:
+        """ Get all paths in `sys.path` that are the given path, or one of its parent directories """
+        return self.get_trie().find_parents(path)
+
+    def append(self, path: str):
+        """ Append the path to `sys.path` and the index """
+        trie = self.get_trie()
+        sys.path.append(path)
+        self.sys_path_snapshot.append(path)
+        trie.add(path)
+
+
+SYS_PATH_INDEX = SysPathIndex()
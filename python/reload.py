@@ -3,45 +3,317 @@ Reloads all modules in the user's workspace folders
 """
 from __future__ import annotations
 
+import importlib.util
 import importlib
 import traceback
+import builtins
+import ast
+import hashlib
+import types
 import time
 import json
 import sys
 import os
 
+from contextlib import nullcontext
+
 import unreal
 
+from vscode_unreal_python.path_index import PathTrie
+from vscode_unreal_python.telemetry import span
+
+# The state of each module's source file when it was last loaded, {module_name: (mtime_ns, size, sha1)}
+# This script is only executed once per session by `vsc_eval`, so the states are kept between reloads
+SOURCE_STATES: dict[str, tuple[int, int, str]] = {}
+
+# Modules that failed to reload, these are always reloaded again on the next reload.
+# Reloading rewrites the .pyc file even if executing the module fails, so the file states would consider them unchanged
+FAILED_MODULES: set[str] = set()
+
+# Module names imported by each source file, {filepath: ((mtime_ns, size), module_names)}
+IMPORTS_CACHE: dict[str, tuple[tuple[int, int], set[str]]] = {}
+
+
+def get_file_hash(filepath: str) -> str:
+    with open(filepath, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def record_source_state(module_name: str, filepath: str):
+    """ Store the current state of the module's source file, so it can be compared against on the next reload """
+    try:
+        stat = os.stat(filepath)
+        SOURCE_STATES[module_name] = (stat.st_mtime_ns, stat.st_size, get_file_hash(filepath))
+    except OSError:
+        SOURCE_STATES.pop(module_name, None)
+
+
+def get_compiled_source_state(module: types.ModuleType) -> tuple[int, int] | None:
+    """
+    Read the source mtime & size stored in the header of the module's .pyc file.
+    These are the values the source file had when the module was compiled, and thereby imported.
+    """
+    cached_filepath = getattr(module, "__cached__", None)
+    if not cached_filepath:
+        return None
+
+    try:
+        with open(cached_filepath, 'rb') as file:
+            header = file.read(16)
+    except OSError:
+        return None
+
+    if len(header) < 16 or header[:4] != importlib.util.MAGIC_NUMBER:
+        return None
+
+    # Hash based .pyc files don't store the mtime
+    if int.from_bytes(header[4:8], "little") != 0:
+        return None
+
+    return int.from_bytes(header[8:12], "little"), int.from_bytes(header[12:16], "little")
+
+
+def is_module_changed(module: types.ModuleType, filepath: str) -> bool:
+    """ Check if the module's source file has changed since the module was last loaded """
+    if not filepath.endswith(".py"):
+        return True
+
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return True
+
+    source_state = SOURCE_STATES.get(module.__name__)
+    if source_state:
+        if source_state[:2] == (stat.st_mtime_ns, stat.st_size):
+            return False
+
+        # The file may have been touched/saved without any changes
+        file_hash = get_file_hash(filepath)
+        if source_state[2] == file_hash:
+            SOURCE_STATES[module.__name__] = (stat.st_mtime_ns, stat.st_size, file_hash)
+            return False
+
+        return True
+
+    # The module has not been reloaded before, compare against the state it was compiled with
+    compiled_state = get_compiled_source_state(module)
+    if compiled_state == (int(stat.st_mtime) & 0xFFFFFFFF, stat.st_size & 0xFFFFFFFF):
+        record_source_state(module.__name__, filepath)
+        return False
+
+    return True
+
+
+def get_imported_module_names(module: types.ModuleType, filepath: str) -> set[str]:
+    """
+    Get the names of all modules imported in the module's source file, including the parent packages.
+    `from X import Y` statements also adds 'X.Y' since Y may be a submodule.
+    """
+    try:
+        stat = os.stat(filepath)
+        cached_imports = IMPORTS_CACHE.get(filepath)
+        if cached_imports and cached_imports[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached_imports[1]
+
+        with open(filepath, 'r', encoding="utf-8") as file:
+            parsed_code = ast.parse(file.read(), filepath)
+    except (OSError, SyntaxError, ValueError):
+        return set()
+
+    package = module.__package__ or ""
+
+    module_names = set()
+    for node in ast.walk(parsed_code):
+        if isinstance(node, ast.Import):
+            module_names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package.rsplit(".", node.level - 1)[0] if node.level > 1 else package
+                base = f"{base}.{node.module}" if node.module else base
+            else:
+                base = node.module or ""
+
+            module_names.add(base)
+            module_names.update(f"{base}.{alias.name}" for alias in node.names)
+
+    # Importing 'a.b.c' also imports 'a' and 'a.b'
+    for name in list(module_names):
+        while "." in name:
+            name = name.rpartition(".")[0]
+            module_names.add(name)
 
-def reload(workspace_folders: list[str]):
+    IMPORTS_CACHE[filepath] = ((stat.st_mtime_ns, stat.st_size), module_names)
+    return module_names
+
+
+def get_module_dependencies(module: types.ModuleType, filepath: str, module_names: set[str]) -> set[str]:
+    """ Get the names of the modules in `module_names` that the module imports """
+    dependencies = get_imported_module_names(module, filepath) & module_names
+    dependencies.discard(module.__name__)
+    return dependencies
+
+
+def get_reload_order(changed: set[str], dependencies: dict[str, set[str]]) -> list[str]:
+    """
+    Get the changed modules and all modules depending on them, sorted so each module is reloaded after its dependencies.
+    Modules that are part of a circular import are reloaded in alphabetical order.
+    """
+    dependents: dict[str, set[str]] = {name: set() for name in dependencies}
+    for name, module_dependencies in dependencies.items():
+        for dependency in module_dependencies:
+            dependents[dependency].add(name)
+
+    to_reload = set(changed)
+    stack = list(changed)
+    while stack:
+        for dependent in dependents[stack.pop()]:
+            if dependent not in to_reload:
+                to_reload.add(dependent)
+                stack.append(dependent)
+
+    num_dependencies = {name: len(dependencies[name] & to_reload) for name in to_reload}
+
+    order = []
+    ready = sorted(name for name, num in num_dependencies.items() if num == 0)
+    while ready:
+        name = ready.pop(0)
+        order.append(name)
+        for dependent in sorted(dependents[name] & to_reload):
+            num_dependencies[dependent] -= 1
+            if num_dependencies[dependent] == 0:
+                ready.append(dependent)
+
+    if len(order) < len(to_reload):
+        ordered = set(order)
+        order.extend(sorted(name for name in to_reload if name not in ordered))
+
+    return order
+
+
+class ImportTimer:
+    """
+    Context manager measuring the time spent on each import statement that loads a new module.
+    Time is inclusive, so it also contains the time of any nested imports.
+    """
+
+    def __init__(self):
+        self.original_import = builtins.__import__
+        self.import_times: dict[str, float] = {}
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module_name = name
+        if level:
+            try:
+                module_name = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                pass
+
+        if module_name in sys.modules:
+            return self.original_import(name, globals, locals, fromlist, level)
+
+        start_time = time.perf_counter()
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed_time_ms = (time.perf_counter() - start_time) * 1000
+            self.import_times[module_name] = self.import_times.get(module_name, 0.0) + elapsed_time_ms
+
+    def get_import_times(self) -> list[dict]:
+        return [{"name": name, "time": round(elapsed_time_ms, 2)}
+                for name, elapsed_time_ms in sorted(self.import_times.items(), key=lambda x: x[1], reverse=True)]
+
+    def __enter__(self):
+        builtins.__import__ = self.timed_import
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        builtins.__import__ = self.original_import
+
+
+def reload(workspace_folders: list[str], num_slowest: int = 5, time_imports: bool = False):
+    """
+    Reload the modules in the workspace folders that have changed, and the modules importing them
+    :param num_slowest: Number of the slowest modules to print to the log
+    :param time_imports: Measure the time spent on each new import within every reloaded module
+    """
     start_time = time.perf_counter()
 
     num_reloads = 0
     num_failed = 0
 
-    workspace_folders = [os.path.normpath(folder).lower() for folder in workspace_folders]
+    workspace_folders_trie = PathTrie(workspace_folders)
 
+    workspace_modules: dict[str, tuple[types.ModuleType, str]] = {}
     for variable in list(sys.modules.values()):
         # Check if variable is a module
         if not hasattr(variable, '__file__') or not variable.__file__:
             continue
 
-        filepath = variable.__file__.lower()
-
-        if not any(filepath.startswith(x) for x in workspace_folders):
+        if not workspace_folders_trie.find_parents(variable.__file__):
             continue
 
+        workspace_modules[variable.__name__] = (variable, variable.__file__)
+
+    module_names = set(workspace_modules)
+    with span("reload.dependencies"):
+        dependencies = {name: get_module_dependencies(module, filepath, module_names) for name, (module, filepath) in workspace_modules.items()}
+    with span("reload.find_changed"):
+        changed = {name for name, (module, filepath) in workspace_modules.items() if name in FAILED_MODULES or is_module_changed(module, filepath)}
+
+    reload_order = get_reload_order(changed, dependencies)
+
+    reloaded = set(reload_order)
+    skipped = sorted(name for name in workspace_modules if name not in reloaded)
+
+    module_times = []
+    for module_name in reload_order:
+        module, filepath = workspace_modules[module_name]
+        module_start_time = time.perf_counter()
+        import_timer = ImportTimer() if time_imports else None
         try:
-            importlib.reload(variable)
+            with import_timer or nullcontext(), span("reload.reload_module"):
+                importlib.reload(module)
+            success = True
         except Exception as e:
-            unreal.log_error(f'Failed to reload "{filepath}":\n{traceback.format_exc()}')
+            SOURCE_STATES.pop(module_name, None)
+            FAILED_MODULES.add(module_name)
+            unreal.log_error(f'Failed to reload "{filepath.lower()}":\n{traceback.format_exc()}')
+            success = False
+
+        module_time = {
+            "name": module_name,
+            "time": round((time.perf_counter() - module_start_time) * 1000, 2),
+            "success": success
+        }
+        if import_timer:
+            module_time["imports"] = import_timer.get_import_times()
+        module_times.append(module_time)
+
+        if not success:
             num_failed += 1
             continue
 
+        FAILED_MODULES.discard(module_name)
+        record_source_state(module_name, filepath)
         num_reloads += 1
 
     elapsed_time_ms = int((time.perf_counter() - start_time) * 1000)
 
-    print(f"Reloaded {num_reloads} modules in {elapsed_time_ms}ms")
+    print(f"Reloaded {num_reloads} modules in {elapsed_time_ms}ms, skipped {len(skipped)} unchanged modules")
+
+    slowest_modules = sorted(module_times, key=lambda x: x["time"], reverse=True)[:num_slowest]
+    if slowest_modules:
+        print("Slowest modules to reload:")
+        for module_time in slowest_modules:
+            print(f"  {module_time['time']:>10.2f}ms  {module_time['name']}")
+            for import_time in module_time.get("imports", [])[:num_slowest]:
+                print(f"  {import_time['time']:>10.2f}ms    import {import_time['name']}")
 
-    return json.dumps({"num_reloads": num_reloads, "time": elapsed_time_ms, "num_failed": num_failed})
+    return json.dumps({
+        "num_reloads": num_reloads,
+        "time": elapsed_time_ms,
+        "num_failed": num_failed,
+        "skipped": skipped,
+        "modules": module_times
+    })
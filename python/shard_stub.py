@@ -0,0 +1,235 @@
+"""
+Split the 'unreal.py' stub file generated by Unreal into a package of smaller `.pyi` files, one per C++ module.
+Pylance then only has to parse the files of the types that are actually used, instead of the entire stub file.
+Only the files whose content changed since the last time are rewritten.
+"""
+from __future__ import annotations
+
+import tokenize
+import hashlib
+import json
+import re
+import io
+import os
+
+from vscode_unreal_python.get_stub_path import get_python_stub_dir
+
+STUB_FILENAME = "unreal.py"
+SHARDS_DIRNAME = "Sharded"
+PACKAGE_NAME = "unreal"
+MANIFEST_FILENAME = "shards.json"
+
+# Increment this whenever the layout of the shards changes, to regenerate all existing shards
+SHARDS_VERSION = 1
+
+# Shard for everything not belonging to a C++ module, e.g. module level functions & the wrapper base classes
+CORE_SHARD_NAME = "_core"
+
+# Shards larger than this are split further by the first letter of the names
+MAX_SHARD_SIZE = 1024 * 1024
+
+MODULE_PATTERN = re.compile(r"^\s*- \*\*Module\*\*: (\w+)", re.MULTILINE)
+DEFINITION_PATTERN = re.compile(r"(?:class|def)\s+(\w+)|(\w+)\s*[:=]")
+
+
+class StubBlock:
+    """ A top level statement in the stub file, e.g. a class or a function including its decorators """
+    __slots__ = ("name", "lines")
+
+    def __init__(self, name: str | None):
+        self.name = name
+        self.lines: list[str] = []
+
+    def get_module_name(self) -> str | None:
+        """ Get the C++ module from the '**C++ Source:**' section of the docstring """
+        match = MODULE_PATTERN.search("".join(self.lines[:50]))
+        return match.group(1) if match else None
+
+
+def split_stub(filepath: str) -> tuple[list[str], list[StubBlock]]:
+    """
+    Split the stub file into its top level statements
+    :returns: The import statements, and all other top level statements
+    """
+    import_lines: list[str] = []
+    blocks: list[StubBlock] = []
+    block: StubBlock | None = None
+    is_in_string = False
+
+    with open(filepath, 'r', encoding="utf-8") as file:
+        for line in file:
+            is_statement = not is_in_string and line[:1] not in " \t\r\n#)]}"
+
+            # The stub only uses triple double quotes for docstrings
+            if line.count('"""') % 2:
+                is_in_string = not is_in_string
+
+            if not is_statement:
+                if block:
+                    block.lines.append(line)
+                elif line.startswith("#"):
+                    import_lines.append(line)
+                continue
+
+            if line.startswith(("import ", "from ")):
+                import_lines.append(line)
+                block = None
+                continue
+
+            # Decorators belong to the definition following them
+            if not (block and block.name is None and block.lines[-1].startswith("@")):
+                block = StubBlock(None)
+                blocks.append(block)
+
+            if not line.startswith("@"):
+                match = DEFINITION_PATTERN.match(line)
+                if match:
+                    block.name = match.group(1) or match.group(2)
+
+            block.lines.append(line)
+
+    return import_lines, blocks
+
+
+def get_shards(blocks: list[StubBlock]) -> dict[str, list[StubBlock]]:
+    """ Group the blocks by their C++ module """
+    shards: dict[str, list[StubBlock]] = {}
+    for block in blocks:
+        module_name = block.get_module_name()
+        shard_name = f"_{module_name}" if module_name else CORE_SHARD_NAME
+        shards.setdefault(shard_name, []).append(block)
+
+    # Split large shards by the first letter of the names, so a change only rewrites a part of e.g. the Engine module
+    for shard_name in list(shards):
+        shard_blocks = shards[shard_name]
+        if sum(len(line) for block in shard_blocks for line in block.lines) <= MAX_SHARD_SIZE:
+            continue
+
+        del shards[shard_name]
+        for block in shard_blocks:
+            letter = (block.name or "_").lstrip("_")[:1].upper() or "_"
+            shards.setdefault(f"{shard_name}_{letter}", []).append(block)
+
+    return shards
+
+
+def get_referenced_names(code: str) -> set[str]:
+    """
+    Get the names used in the code, ignoring words in docstrings & comments and attribute names (e.g. `actor` in `self.actor`),
+    since importing those would add imports that aren't needed, and could cause import cycles between the shards
+    """
+    names = set()
+    previous_token = None
+    for token in tokenize.generate_tokens(io.StringIO(code).readline):
+        if token.type == tokenize.NAME and not (previous_token and previous_token.type == tokenize.OP and previous_token.string == "."):
+            names.add(token.string)
+        if token.type not in (tokenize.NL, tokenize.NEWLINE, tokenize.COMMENT):
+            previous_token = token
+
+    return names
+
+
+def get_shard_content(shard_name: str, blocks: list[StubBlock], import_lines: list[str], name_to_shard: dict[str, str]) -> str:
+    """ Get the content of a shard file, importing the names it references from the other shards """
+    code = "".join(line for block in blocks for line in block.lines)
+
+    imports: dict[str, set[str]] = {}
+    for name in get_referenced_names(code):
+        other_shard_name = name_to_shard.get(name)
+        if other_shard_name and other_shard_name != shard_name:
+            imports.setdefault(other_shard_name, set()).add(name)
+
+    lines = list(import_lines)
+    for other_shard_name, names in sorted(imports.items()):
+        lines.append(f"from .{other_shard_name} import {', '.join(sorted(names))}\n")
+
+    return "".join(lines) + "\n\n" + code
+
+
+def get_init_content(shards: dict[str, list[StubBlock]]) -> str:
+    """ Get the content of the package's `__init__.pyi`, re-exporting all names from the shards """
+    lines = []
+    for shard_name, blocks in sorted(shards.items()):
+        names = sorted({block.name for block in blocks if block.name})
+        if names:
+            lines.append(f"from .{shard_name} import (\n")
+            lines.extend(f"    {name} as {name},\n" for name in names)
+            lines.append(")\n")
+
+    return "".join(lines)
+
+
+def get_hash(content: str) -> str:
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+def read_manifest(filepath: str) -> dict:
+    try:
+        with open(filepath, 'r', encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+    return manifest if manifest.get("version") == SHARDS_VERSION else {}
+
+
+def shard_stub(stub_dirpath: str | None = None) -> str:
+    """
+    Split the stub file into a package of smaller stub files
+    :param stub_dirpath: Directory of the 'unreal.py' stub file, defaults to the stub directory of the current project
+    :returns: A JSON object with the directory to add to the Python analysis paths, and the number of shards written/removed
+    """
+    if stub_dirpath is None:
+        stub_dirpath = get_python_stub_dir()
+
+    stub_filepath = os.path.join(stub_dirpath, STUB_FILENAME)
+    shards_dirpath = os.path.join(stub_dirpath, SHARDS_DIRNAME)
+    package_dirpath = os.path.join(shards_dirpath, PACKAGE_NAME)
+    manifest_filepath = os.path.join(shards_dirpath, MANIFEST_FILENAME)
+
+    stat = os.stat(stub_filepath)
+    stub_key = [stat.st_size, stat.st_mtime_ns]
+
+    manifest = read_manifest(manifest_filepath)
+    old_hashes: dict[str, str] = manifest.get("shards", {})
+    result = {"path": shards_dirpath, "written": 0, "removed": 0, "total": len(old_hashes)}
+
+    # The stub is only regenerated when Unreal starts, so it's usually unchanged
+    if manifest.get("stub") == stub_key and all(os.path.isfile(os.path.join(package_dirpath, filename)) for filename in old_hashes):
+        return json.dumps(result)
+
+    import_lines, blocks = split_stub(stub_filepath)
+    shards = get_shards(blocks)
+
+    name_to_shard = {}
+    for shard_name, shard_blocks in shards.items():
+        for block in shard_blocks:
+            if block.name:
+                name_to_shard[block.name] = shard_name
+
+    files = {f"{shard_name}.pyi": get_shard_content(shard_name, shard_blocks, import_lines, name_to_shard) for shard_name, shard_blocks in shards.items()}
+    files["__init__.pyi"] = get_init_content(shards)
+
+    os.makedirs(package_dirpath, exist_ok=True)
+
+    new_hashes = {}
+    for filename, content in files.items():
+        new_hashes[filename] = get_hash(content)
+        filepath = os.path.join(package_dirpath, filename)
+        if old_hashes.get(filename) != new_hashes[filename] or not os.path.isfile(filepath):
+            with open(filepath, 'w', encoding="utf-8") as file:
+                file.write(content)
+            result["written"] += 1
+
+    for filename in old_hashes.keys() - new_hashes.keys():
+        try:
+            os.remove(os.path.join(package_dirpath, filename))
+            result["removed"] += 1
+        except OSError:
+            pass
+
+    with open(manifest_filepath, 'w', encoding="utf-8") as file:
+        json.dump({"version": SHARDS_VERSION, "stub": stub_key, "shards": new_hashes}, file)
+
+    result["total"] = len(new_hashes)
+    return json.dumps(result)
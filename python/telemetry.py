@@ -0,0 +1,125 @@
+"""
+Lightweight timing spans for the helper scripts, recorded in a fixed-size ring buffer in the Unreal process.
+The spans are only kept in memory, query them with `get_percentiles` to see where the time goes on a real project.
+"""
+from __future__ import annotations
+
+import functools
+import array
+import time
+import json
+import math
+
+# Max number of spans kept, the oldest spans are overwritten once the buffer is full
+MAX_SPANS = 4096
+
+PERCENTILES = (50, 90, 99)
+
+
+class SpanBuffer:
+    """ Ring buffer of (operation name, duration) spans """
+    __slots__ = ("size", "names", "durations", "index", "count")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.names: list[str | None] = [None] * size
+        self.durations = array.array("d", bytes(8 * size))
+        self.index = 0
+        self.count = 0
+
+    def add(self, name: str, duration: float):
+        index = self.index
+        self.names[index] = name
+        self.durations[index] = duration
+        self.index = (index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def get_durations(self) -> dict[str, list[float]]:
+        """ Get the recorded durations of each operation """
+        durations: dict[str, list[float]] = {}
+        for name, duration in zip(self.names, self.durations):
+            if name is not None:
+                durations.setdefault(name, []).append(duration)
+        return durations
+
+    def clear(self):
+        self.names = [None] * self.size
+        self.index = 0
+        self.count = 0
+
+
+SPANS = SpanBuffer(MAX_SPANS)
+
+
+class span:
+    """
+    Context manager recording the time spent inside it as a span, e.g.
+    ```
+    with span("build_toc.load"):
+        ...
+    ```
+    """
+    __slots__ = ("name", "start_time")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        SPANS.add(self.name, time.perf_counter() - self.start_time)
+
+
+def timed(name: str):
+    """ Decorator recording each call to the function as a span """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                SPANS.add(name, time.perf_counter() - start_time)
+        return wrapper
+    return decorator
+
+
+def get_percentile(sorted_values: list[float], percentile: float) -> float:
+    """ Get the percentile using the nearest-rank method """
+    index = max(0, math.ceil(percentile / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def get_percentiles(prefix: str = "", reset: bool = False) -> str:
+    """
+    Get statistics of the recorded spans of each operation, all times are in milliseconds
+    :param prefix: Only include operations whose name starts with this, e.g. "execute."
+    :param reset: Clear all recorded spans afterwards
+    :returns: A JSON object {operation: {"count", "total", "min", "max", "p50", "p90", "p99"}}
+    """
+    stats = {}
+    for name, durations in sorted(SPANS.get_durations().items()):
+        if not name.startswith(prefix):
+            continue
+
+        durations.sort()
+        operation_stats = {
+            "count": len(durations),
+            "total": round(sum(durations) * 1000, 3),
+            "min": round(durations[0] * 1000, 3),
+            "max": round(durations[-1] * 1000, 3),
+        }
+        for percentile in PERCENTILES:
+            operation_stats[f"p{percentile}"] = round(get_percentile(durations, percentile) * 1000, 3)
+        stats[name] = operation_stats
+
+    if reset:
+        SPANS.clear()
+
+    return json.dumps(stats)
+
+
+def clear_spans():
+    SPANS.clear()
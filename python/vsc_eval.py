@@ -1,4 +1,204 @@
+from __future__ import annotations
+
+import importlib.machinery
+import importlib.util
+import compileall
+import importlib
+import traceback
+import tempfile
+import hashlib
+import shutil
+import uuid
+import time
+import zlib
 import json  # Needs to be here to ensure the json module is available in remote-handler.ts `evaluateFunction`
+import sys
+import os
+
+from collections import OrderedDict
+
+# Max number of helper files to keep compiled in memory
+VSC_EVAL_CACHE_SIZE = 32
+
+# Name of the package the helper scripts can import shared modules from, e.g. `from vscode_unreal_python import path_index`
+VSC_HELPERS_PACKAGE_NAME = "vscode_unreal_python"
+
+# The helper scripts are copied & compiled into a sub-folder named after their version, see `vsc_install_helpers`.
+# remote-handler.ts passes a folder in the extension's global storage, this is only used if it doesn't.
+# Not inside the extension's temp folder, since that's deleted when VS Code closes while Unreal may still import from it
+VSC_HELPERS_DEFAULT_INSTALL_DIRPATH = os.path.join(tempfile.gettempdir(), "VSCode-Unreal-Python-Helpers")
+
+# File in each installed version folder, touched whenever an Unreal instance starts using that version
+VSC_HELPERS_USED_MARKER_FILENAME = ".last-used"
+
+# Installed versions that haven't been used for this long (in seconds) are removed, see `vsc_prune_helpers`
+VSC_HELPERS_MAX_UNUSED_AGE = 7 * 24 * 60 * 60
+
+# Temp folders of unfinished installs older than this (in seconds) are left over from a crash
+VSC_HELPERS_STALE_TEMP_AGE = 60 * 60
+
+# String results larger than this (in bytes) are written to a file instead of being returned, see `vsc_eval_out_of_band`
+VSC_OUT_OF_BAND_MIN_SIZE = 64 * 1024
+VSC_OUT_OF_BAND_DIRPATH = os.path.join(tempfile.gettempdir(), "VSCode-Unreal-Python", "results")
+
+# Name of the span recorded for each `vsc_eval` call, {(filepath, function_name): span_name}
+VSC_SPAN_NAMES: dict = {}
+
+
+class VscNoSpans:
+    """ Discards the spans, used until the helpers' telemetry module has been imported or if it can't be imported """
+
+    def add(self, name: str, duration: float):
+        pass
+
+
+# The span buffer of the helpers' telemetry module, see `vsc_initialize_helpers`
+VSC_SPANS = VscNoSpans()
+
+
+class VscEvalCachedFile:
+    """
+    A compiled helper file that's executed in the globals, e.g. execute.py.
+    Invalidated when the file's modification time or size changes.
+    """
+
+    def __init__(self, filepath: str, stat: os.stat_result):
+        self.key = (stat.st_mtime_ns, stat.st_size)
+
+        with open(filepath, 'r', encoding="utf8") as file:
+            self.code = compile(file.read(), filepath, 'exec')
+
+
+def vsc_install_helpers(source_dirpath: str, install_root_dirpath: str, version: str) -> str:
+    """
+    Copy the helper scripts to a folder unique to the version and compile them, unless they're already installed.
+    :param install_root_dirpath: The folder containing the installed versions
+    :returns: The folder the helper scripts were installed to
+    """
+    install_dirpath = os.path.join(install_root_dirpath, version)
+    if os.path.isdir(install_dirpath):
+        return install_dirpath
+
+    # Install into a temp folder first, so a partially installed version is never used
+    temp_dirpath = f"{install_dirpath}-{os.getpid()}.tmp"
+    shutil.rmtree(temp_dirpath, ignore_errors=True)
+    shutil.copytree(source_dirpath, temp_dirpath, ignore=shutil.ignore_patterns("__pycache__", "*.pyc"))
+    compileall.compile_dir(temp_dirpath, quiet=1)
+
+    try:
+        os.replace(temp_dirpath, install_dirpath)
+    except OSError:
+        # Another Unreal instance may have installed the same version at the same time
+        shutil.rmtree(temp_dirpath, ignore_errors=True)
+        if not os.path.isdir(install_dirpath):
+            raise
+    else:
+        vsc_prune_helpers(install_root_dirpath, version)
+
+    return install_dirpath
+
+
+def vsc_mark_helpers_used(dirpath: str):
+    """ Touch the marker file of an installed version, so it isn't pruned while an Unreal instance may still be using it """
+    marker_filepath = os.path.join(dirpath, VSC_HELPERS_USED_MARKER_FILENAME)
+    try:
+        with open(marker_filepath, 'a'):
+            pass
+        os.utime(marker_filepath)
+    except OSError:
+        pass
+
+
+def vsc_prune_helpers(install_root_dirpath: str, version: str):
+    """
+    Remove the helper scripts of other versions that haven't been used for `VSC_HELPERS_MAX_UNUSED_AGE`,
+    and temp folders left over from installs that never finished.
+    Imported files aren't locked, so this is based on the time instead of on the folders being in use.
+    """
+    try:
+        dir_entries = list(os.scandir(install_root_dirpath))
+    except OSError:
+        return
+
+    current_time = time.time()
+    for dir_entry in dir_entries:
+        if dir_entry.name == version or not dir_entry.is_dir(follow_symlinks=False):
+            continue
+
+        try:
+            if dir_entry.name.endswith(".tmp"):
+                # Temp folders of installs that are still in progress by another Unreal instance are kept
+                if current_time - dir_entry.stat(follow_symlinks=False).st_mtime < VSC_HELPERS_STALE_TEMP_AGE:
+                    continue
+            else:
+                marker_filepath = os.path.join(dir_entry.path, VSC_HELPERS_USED_MARKER_FILENAME)
+                last_used_time = os.stat(marker_filepath).st_mtime if os.path.isfile(marker_filepath) else dir_entry.stat().st_mtime
+                if current_time - last_used_time < VSC_HELPERS_MAX_UNUSED_AGE:
+                    continue
+        except OSError:
+            continue
+
+        shutil.rmtree(dir_entry.path, ignore_errors=True)
+
+
+def vsc_register_helpers_package(dirpath: str, version: str | None = None):
+    """ Register the directory containing the helper scripts as a package, so they can import modules from each other """
+    package = sys.modules.get(VSC_HELPERS_PACKAGE_NAME)
+    if package is not None and list(package.__path__) == [dirpath]:
+        return
+
+    # The extension has been updated/moved, drop any submodules imported from the old location
+    for module_name in [name for name in sys.modules if name.startswith(f"{VSC_HELPERS_PACKAGE_NAME}.")]:
+        del sys.modules[module_name]
+
+    spec = importlib.machinery.ModuleSpec(VSC_HELPERS_PACKAGE_NAME, None, is_package=True)
+    spec.submodule_search_locations = [dirpath]
+    package = importlib.util.module_from_spec(spec)
+    package.__version__ = version
+    sys.modules[VSC_HELPERS_PACKAGE_NAME] = package
+
+
+def vsc_handshake(version: str) -> bool:
+    """ Check if the given version of the helper scripts is installed and registered, see remote-handler.ts `initializeHelpers` """
+    package = sys.modules.get(VSC_HELPERS_PACKAGE_NAME)
+    if package is None or package.__version__ != version or not os.path.isdir(package.__path__[0]):
+        return False
+
+    if package.__path__[0] != VSC_HELPERS_SOURCE_DIRPATH:
+        vsc_mark_helpers_used(package.__path__[0])
+
+    return True
+
+
+def vsc_get_helper_module_name(filepath: str) -> str | None:
+    """ Get the name of the module in the helpers package matching the filepath, if the file is one of the helper scripts """
+    module_names: dict = globals().setdefault("__VsCodeHelperModuleNames__", {})
+    if filepath not in module_names:
+        relative_filepath = os.path.relpath(os.path.abspath(filepath), VSC_HELPERS_SOURCE_DIRPATH)
+        if relative_filepath.startswith("..") or not relative_filepath.endswith(".py"):
+            module_names[filepath] = None
+        else:
+            module_names[filepath] = f"{VSC_HELPERS_PACKAGE_NAME}.{relative_filepath[:-3].replace(os.sep, '.')}"
+
+    return module_names[filepath]
+
+
+def vsc_get_cached_file(filepath: str) -> VscEvalCachedFile:
+    """ Get the compiled code for a file, re-compiling it if it has changed since it was last cached """
+    cache: OrderedDict = globals().setdefault("__VsCodeEvalCache__", OrderedDict())
+
+    stat = os.stat(filepath)
+    cached_file = cache.get(filepath)
+    if cached_file is not None and cached_file.key == (stat.st_mtime_ns, stat.st_size):
+        cache.move_to_end(filepath)
+        return cached_file
+
+    cached_file = VscEvalCachedFile(filepath, stat)
+    cache[filepath] = cached_file
+    while len(cache) > VSC_EVAL_CACHE_SIZE:
+        cache.popitem(last=False)
+
+    return cached_file
 
 
 def vsc_eval(filepath: str, function_name: str, use_globals: bool, **kwargs):
@@ -6,19 +206,102 @@ def vsc_eval(filepath: str, function_name: str, use_globals: bool, **kwargs):
     Evaluate a function in a Python file, and return the function's return value
     This function is used to evaluate VS Code python files and return the result to the Extension
     """
-    with open(filepath, 'r', encoding="utf8") as file:
-        code = file.read()
+    start_time = time.perf_counter()
+    try:
+        # Find the function
+        if use_globals:
+            exec_globals = globals()
+            exec(vsc_get_cached_file(filepath).code, exec_globals)
+        else:
+            # Helper scripts that don't use the globals are imported from the installed helpers package
+            module_name = vsc_get_helper_module_name(filepath)
+            if not module_name:
+                raise ValueError(f"File '{filepath}' isn't one of the helper scripts, only those can be evaluated without the globals")
+            exec_globals = vars(importlib.import_module(module_name))
 
-    # Find the function
-    if use_globals:
-        exec_globals = globals()
-    else:
-        exec_globals = {}
+        if function_name in exec_globals:
+            function = exec_globals[function_name]
+            return function(**kwargs)
+        else:
+            raise ValueError(f"Function '{function_name}' not found in file '{filepath}'")
+    finally:
+        span_name = VSC_SPAN_NAMES.get((filepath, function_name)) or vsc_get_span_name(filepath, function_name)
+        VSC_SPANS.add(span_name, time.perf_counter() - start_time)
 
-    exec(compile(code, filepath, 'exec'), exec_globals)
 
-    if function_name in exec_globals:
-        function = exec_globals[function_name]
-        return function(**kwargs)
-    else:
-        raise ValueError(f"Function '{function_name}' not found in file '{filepath}'")
+def vsc_get_span_name(filepath: str, function_name: str) -> str:
+    """ Get the name of the span recorded for each `vsc_eval` call, e.g. "vsc_eval:execute.py.main" """
+    span_name = f"vsc_eval:{os.path.basename(filepath)}.{function_name}"
+    VSC_SPAN_NAMES[(filepath, function_name)] = span_name
+    return span_name
+
+
+def vsc_eval_batch(calls: list) -> str:
+    """
+    Evaluate multiple functions in a single remote command, see `vsc_eval`
+    :param calls: List of [filepath, function_name, use_globals, kwargs]
+    :returns: JSON list with a {"result": ..., "error": ...} object for each call, in the same order as `calls`
+    """
+    results = []
+    for filepath, function_name, use_globals, kwargs in calls:
+        try:
+            results.append({"result": vsc_eval(filepath, function_name, use_globals, **kwargs), "error": None})
+        except Exception:
+            results.append({"result": None, "error": traceback.format_exc()})
+
+    # Results that can't be serialized are returned as their string representation
+    return json.dumps(results, default=str)
+
+
+def vsc_eval_out_of_band(filepath: str, function_name: str, use_globals: bool, **kwargs) -> str:
+    """
+    Evaluate a function like `vsc_eval`, but large string results are written zlib compressed to a file in the temp folder,
+    so they don't have to be escaped & sent through the remote execution socket. VS Code is responsible for deleting the file.
+    :returns: A JSON object, either {"result": ...} or {"path": ..., "size": ..., "hash": ...} where size & hash are of the uncompressed data
+    """
+    result = vsc_eval(filepath, function_name, use_globals, **kwargs)
+    if not isinstance(result, str) or len(result) < VSC_OUT_OF_BAND_MIN_SIZE:
+        return json.dumps({"result": result}, default=str)
+
+    data = result.encode("utf-8")
+
+    os.makedirs(VSC_OUT_OF_BAND_DIRPATH, exist_ok=True)
+    result_filepath = os.path.join(VSC_OUT_OF_BAND_DIRPATH, f"{uuid.uuid4()}.zlib")
+    with open(result_filepath, 'wb') as file:
+        file.write(zlib.compress(data, 1))
+
+    return json.dumps({"path": result_filepath, "size": len(data), "hash": hashlib.sha1(data).hexdigest()})
+
+
+def vsc_initialize_helpers(version: str | None, install_root_dirpath: str | None = None):
+    """
+    Install & register the helpers package, falling back to the source folder if it can't be installed
+    :param install_root_dirpath: The folder to install the helpers to, defaults to `VSC_HELPERS_DEFAULT_INSTALL_DIRPATH`
+    """
+    globals()["__VsCodeHelperModuleNames__"] = {}
+
+    helpers_dirpath = VSC_HELPERS_SOURCE_DIRPATH
+    if version:
+        try:
+            helpers_dirpath = vsc_install_helpers(VSC_HELPERS_SOURCE_DIRPATH, install_root_dirpath or VSC_HELPERS_DEFAULT_INSTALL_DIRPATH, version)
+            vsc_mark_helpers_used(helpers_dirpath)
+        except OSError:
+            traceback.print_exc()
+
+    vsc_register_helpers_package(helpers_dirpath, version)
+
+    # Looked up once here instead of on every `vsc_eval` call, the package's telemetry module is the same for the rest of the session
+    global VSC_SPANS
+    try:
+        VSC_SPANS = importlib.import_module(f"{VSC_HELPERS_PACKAGE_NAME}.telemetry").SPANS
+    except Exception:
+        traceback.print_exc()
+
+
+# `__file__` is the path to this file while it's being executed by remote-handler.ts `initializeHelpers`
+VSC_HELPERS_SOURCE_DIRPATH = os.path.dirname(os.path.abspath(__file__))
+
+# Processes started with the "spawn" method (e.g. by get_page_content.py `export_documentation`) import the main module of
+# the editor as "__mp_main__", which is this file since remote-handler.ts executed it. The helpers shouldn't be installed there
+if __name__ != "__mp_main__":
+    vsc_initialize_helpers(globals().get("__VsCodeHelpersVersion__"), globals().get("__VsCodeHelpersInstallDir__"))
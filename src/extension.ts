@@ -9,11 +9,13 @@ import * as selectInstance from './scripts/select-instance';
 import * as execute from './scripts/execute';
 import * as attach from './scripts/attach';
 import * as reload from './scripts/reload';
+import * as sessions from './scripts/sessions';
 
 
 export function activate(context: vscode.ExtensionContext) {
 	// Set the extension directory
 	utils.setExtensionUri(context.extensionUri);
+	utils.setGlobalStorageUri(context.globalStorageUri);
 
 	// Register commands
 	context.subscriptions.push(
@@ -52,6 +54,12 @@ export function activate(context: vscode.ExtensionContext) {
 		})
 	);
 
+	context.subscriptions.push(
+		vscode.commands.registerCommand('ue-python.manageSessions', () => {
+			sessions.main();
+		})
+	);
+
 	// Check if config is changed
 	context.subscriptions.push(
 		vscode.workspace.onDidChangeConfiguration(onConfigurationChanged)
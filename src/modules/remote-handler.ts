@@ -4,15 +4,37 @@
 
 import * as vscode from 'vscode';
 
+import * as crypto from 'crypto';
+import * as zlib from 'zlib';
+
 import { RemoteExecution, RemoteExecutionConfig, RemoteExecutionNode, ECommandOutputType, EExecMode, IRemoteExecutionMessageCommandOutputData } from "unreal-remote-execution";
 
 import * as extensionWiki from "./extension-wiki";
 import * as utils from "./utils";
 import * as logger from "./logger";
 
+const HELPERS_DIRECTORY_NAME = "helpers";  // Folder in the global storage where Unreal installs the python scripts, see vsc_eval.py
+
 let gIsInitializatingConnection = false;
 let gCachedRemoteExecution: RemoteExecution | null = null;
 let gStatusBarItem: vscode.StatusBarItem | null = null;
+let gCachedStubDirectory: string | null = null;
+
+
+export interface IFunctionCall {
+    uri: vscode.Uri;
+    functionName: string;
+    kwargs?: any;
+    useGlobals?: boolean;
+}
+
+export interface IFunctionCallResult {
+    result: any;
+    error: string | null;
+}
+
+// The JSON object returned by `vsc_eval_out_of_band`, size & hash are of the uncompressed data
+type IOutOfBandResult = { result: string | null } | { path: string, size: number, hash: string };
 
 
 // ------------------------------------
@@ -230,29 +252,45 @@ async function onRemoteInstanceCreated(node: RemoteExecutionNode) {
         statusBarItem.show();
     }
 
-    if (!await defineVscEvalFunction())
-        return;
-
     // Check if we should add any workspace folders to the python path
-    const workspaceFolders = vscode.workspace.workspaceFolders;
-    if (workspaceFolders) {
-        let foldersToAddToPath: string[] = [];
-        for (const folder of workspaceFolders) {
-            const config = vscode.workspace.getConfiguration(utils.EXTENSION_ID, folder.uri);
-            if (config.get<boolean>('environment.addWorkspaceToPath', false)) {
-                foldersToAddToPath.push(folder.uri.fsPath);
-            }
+    let foldersToAddToPath: string[] = [];
+    for (const folder of vscode.workspace.workspaceFolders ?? []) {
+        const config = vscode.workspace.getConfiguration(utils.EXTENSION_ID, folder.uri);
+        if (config.get<boolean>('environment.addWorkspaceToPath', false)) {
+            foldersToAddToPath.push(folder.uri.fsPath);
         }
+    }
 
-        if (foldersToAddToPath.length > 0) {
-            await evaluateFunction(
-                utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.addSysPath), "add_paths",
-                {
-                    paths: foldersToAddToPath
-                }
-            );
-        }
+    // Run the rest of the setup in a single round trip
+    const calls: IFunctionCall[] = [
+        { uri: utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.getStubPath), functionName: "get_python_stub_dir" }
+    ];
+    if (foldersToAddToPath.length > 0) {
+        calls.push({
+            uri: utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.addSysPath), functionName: "add_paths",
+            kwargs: {
+                paths: foldersToAddToPath
+            }
+        });
+    }
+
+    // Update the sharded stub files, as Unreal regenerates the 'unreal.py' stub file on startup
+    if (utils.getExtensionConfig().get<boolean>('codeCompletion.shardStub', false)) {
+        calls.push({ uri: utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.shardStub), functionName: "shard_stub" });
     }
+
+    const results = await initializeHelpers(calls);
+    if (results) {
+        gCachedStubDirectory = results[0].error ? null : results[0].result;
+    }
+}
+
+
+/**
+ * Get the directory of the 'unreal.py' stub file for the connected project, if it was retrieved when connecting
+ */
+export function getCachedStubDirectory() {
+    return gCachedStubDirectory;
 }
 
 
@@ -260,6 +298,8 @@ async function onRemoteInstanceCreated(node: RemoteExecutionNode) {
  * Called when the remote connection is closed
  */
 async function onRemoteConnectionClosed() {
+    gCachedStubDirectory = null;
+
     const remoteExecution = await getRemoteExecutionInstance(false);
     if (!remoteExecution?.hasCommandConnection())
         removeStatusBarItem();
@@ -269,11 +309,43 @@ async function onRemoteConnectionClosed() {
 
 
 /**
- * Define the vsc_eval function used in `evaluateFunction`
+ * Make sure the python scripts are installed as a package in Unreal & `vsc_eval` is defined, and then evaluate the given functions.
+ * If the scripts are already installed (e.g. when reconnecting) this only takes a single round trip.
+ * @returns The result of each function call, see `evaluateFunctionBatch`
  */
-export async function defineVscEvalFunction(): Promise<boolean> {
+async function initializeHelpers(calls: IFunctionCall[]): Promise<IFunctionCallResult[] | undefined> {
+    const version = await utils.getPythonScriptsVersion();
+
+    // Only evaluate the functions if the handshake succeeds, otherwise 'None' is returned
+    const command = `${getBatchCommand(calls)} if globals().get('vsc_handshake', lambda version: False)('${version}') else None`;
+    const response = await runCommand(command, true);
+    if (response?.success && response.result !== "None") {
+        return handleBatchResponse(response, calls);
+    }
+
+    if (!await defineVscEvalFunction(version)) {
+        return;
+    }
+
+    return evaluateFunctionBatch(calls);
+}
+
+
+/**
+ * Define the vsc_eval function used in `evaluateFunction`, and install the python scripts as a package in Unreal
+ * @param version The version of the python scripts, see `utils.getPythonScriptsVersion`
+ */
+export async function defineVscEvalFunction(version?: string): Promise<boolean> {
     const filepath = utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.eval);
-    const vsc_eval_response = await executeFile(filepath);
+    const globals: any = { "__VsCodeHelpersVersion__": version ?? await utils.getPythonScriptsVersion() };
+
+    // Install the helpers outside of the temp folder, as that's deleted when the extension is deactivated while Unreal may still use them
+    const globalStorageUri = utils.getGlobalStorageUri();
+    if (globalStorageUri) {
+        globals["__VsCodeHelpersInstallDir__"] = vscode.Uri.joinPath(globalStorageUri, HELPERS_DIRECTORY_NAME).fsPath;
+    }
+
+    const vsc_eval_response = await executeFile(filepath, globals);
     if (!vsc_eval_response) {
         return false;
     }
@@ -327,6 +399,43 @@ export function executeFile(uri: vscode.Uri, globals: any = {}) {
 }
 
 
+/**
+ * Parse a JSON string returned by a Python function
+ * @param result The stringified JSON, or "None"
+ */
+export function parseJsonResult<T>(result: string): T | null {
+    if (result === "None") {
+        return null;
+    }
+
+    // As the result is stringified JSON, make it parsable
+    const jsonString = result.replace(/^'|'$/g, '').replace(/\\'/g, '\'').replace(/\\\\/g, '\\');
+    try {
+        return JSON.parse(jsonString);
+    }
+    catch (e) {
+        logger.showError("Failed to parse the result from Unreal", e as Error);
+    }
+
+    return null;
+}
+
+
+/**
+ * Print the output of a command to the extension's log
+ */
+function logCommandOutput(response: IRemoteExecutionMessageCommandOutputData) {
+    for (const output of response.output) {
+        if (output.type === ECommandOutputType.ERROR)
+            logger.error(output.output.trimEnd());
+        else if (output.type === ECommandOutputType.WARNING)
+            logger.warn(output.output.trimEnd());
+        else
+            logger.info(output.output.trimEnd());
+    }
+}
+
+
 export async function evaluateFunction(uri: vscode.Uri, functionName: string, kwargs: any = {}, useGlobals = false, logOutput = true) {
     let command = `vsc_eval(r'${uri.fsPath}', '${functionName}', ${useGlobals ? "True" : "False"}`;
     if (Object.keys(kwargs).length > 0) {
@@ -337,14 +446,7 @@ export async function evaluateFunction(uri: vscode.Uri, functionName: string, kw
     const response = await runCommand(command, true);
     if (response) {
         if (logOutput) {
-            for (const output of response.output) {
-                if (output.type === ECommandOutputType.ERROR)
-                    logger.error(output.output.trimEnd());
-                else if (output.type === ECommandOutputType.WARNING)
-                    logger.warn(output.output.trimEnd());
-                else
-                    logger.info(output.output.trimEnd());
-            }
+            logCommandOutput(response);
         }
 
         if (!response.success)
@@ -355,10 +457,132 @@ export async function evaluateFunction(uri: vscode.Uri, functionName: string, kw
 }
 
 
+/**
+ * Evaluate a function returning a potentially large string, e.g. JSON.
+ * Large results are written compressed to a file by `vsc_eval_out_of_band` and read from there, instead of being sent as an escaped string.
+ * @returns The string returned by the function, or null if the function failed
+ */
+export async function evaluateFunctionOutOfBand(uri: vscode.Uri, functionName: string, kwargs: any = {}, useGlobals = false, logOutput = true): Promise<string | null> {
+    let command = `vsc_eval_out_of_band(r'${uri.fsPath}', '${functionName}', ${useGlobals ? "True" : "False"}`;
+    if (Object.keys(kwargs).length > 0) {
+        command += `, **json.loads(r'${JSON.stringify(kwargs)}')`;
+    }
+    command += `)`;
+
+    const response = await runCommand(command, true);
+    if (!response) {
+        return null;
+    }
+
+    if (logOutput) {
+        logCommandOutput(response);
+    }
+
+    if (!response.success) {
+        logger.showError("Extension ran into an error", new Error(response.result));
+        return null;
+    }
+
+    const descriptor = parseJsonResult<IOutOfBandResult>(response.result);
+    if (!descriptor) {
+        return null;
+    }
+
+    if ("result" in descriptor) {
+        return descriptor.result;
+    }
+
+    try {
+        return await readOutOfBandResult(descriptor.path, descriptor.size, descriptor.hash);
+    }
+    catch (e) {
+        logger.showError(`Failed to read the result of '${functionName}'`, e as Error);
+    }
+
+    return null;
+}
+
+
+/**
+ * Read, decompress & verify a result written to a file by `vsc_eval_out_of_band`, the file is deleted once read
+ * @param size The size of the uncompressed data in bytes
+ * @param hash The sha1 hash of the uncompressed data
+ */
+async function readOutOfBandResult(filepath: string, size: number, hash: string): Promise<string> {
+    const uri = vscode.Uri.file(filepath);
+    const compressedData = await vscode.workspace.fs.readFile(uri);
+    try {
+        await vscode.workspace.fs.delete(uri, { useTrash: false });
+    }
+    catch (e) {
+        logger.warn(`Failed to delete the result file '${filepath}': ${e}`);
+    }
+
+    const data = zlib.inflateSync(compressedData);
+    if (data.length !== size || crypto.createHash("sha1").update(data).digest("hex") !== hash) {
+        throw new Error(`Result file '${filepath}' is corrupt`);
+    }
+
+    return data.toString("utf-8");
+}
+
+
+/**
+ * Evaluate multiple functions in a single remote command, see `evaluateFunction`
+ * @returns The result or error of each call, in the same order as `calls`. Or undefined if the command itself failed
+ */
+export async function evaluateFunctionBatch(calls: IFunctionCall[], logOutput = true): Promise<IFunctionCallResult[] | undefined> {
+    const response = await runCommand(getBatchCommand(calls), true);
+    if (!response) {
+        return;
+    }
+
+    return handleBatchResponse(response, calls, logOutput);
+}
+
+
+/**
+ * Get the command evaluating all functions using `vsc_eval_batch`
+ */
+function getBatchCommand(calls: IFunctionCall[]) {
+    const batch = calls.map(call => [call.uri.fsPath, call.functionName, call.useGlobals ?? false, call.kwargs ?? {}]);
+    return `vsc_eval_batch(json.loads(r'${JSON.stringify(batch)}'))`;
+}
+
+
+/**
+ * Log the output of a `vsc_eval_batch` command, and parse the result of each function call
+ */
+function handleBatchResponse(response: IRemoteExecutionMessageCommandOutputData, calls: IFunctionCall[], logOutput = true): IFunctionCallResult[] | undefined {
+    if (logOutput) {
+        logCommandOutput(response);
+    }
+
+    if (!response.success) {
+        logger.showError("Extension ran into an error", new Error(response.result));
+        return;
+    }
+
+    const results = parseJsonResult<IFunctionCallResult[]>(response.result);
+    if (!results) {
+        return;
+    }
+
+    for (const [i, result] of results.entries()) {
+        if (result.error) {
+            logger.error(`Failed to evaluate '${calls[i].functionName}':\n${result.error.trimEnd()}`);
+        }
+    }
+
+    return results;
+}
+
+
 /**
  * Close the global remote connection, if there is one
  */
 export async function closeRemoteConnection() {
+    gCachedStubDirectory = null;
     gCachedRemoteExecution?.stop();
     gCachedRemoteExecution = null;
 }
\ No newline at end of file
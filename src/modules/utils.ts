@@ -1,6 +1,7 @@
 import * as vscode from 'vscode';
 
 import * as tcpPortUsed from 'tcp-port-used';
+import * as crypto from 'crypto';
 import * as path from 'path';
 import * as os from "os";
 
@@ -11,6 +12,8 @@ const DEBUG_SESSION_NAME = "Unreal Python"; // The name of the debug session whe
 
 
 let _extensionDir: vscode.Uri | undefined; // Stores the absolute path to this extension's directory, set on activation
+let _globalStorageDir: vscode.Uri | undefined; // Directory for data shared between all workspaces, set on activation
+let _pythonScriptsVersion: string | undefined; // Hash of the python scripts, computed the first time it's requested
 
 /**
  * This function should only be called once, on activation
@@ -20,6 +23,21 @@ export function setExtensionUri(uri: vscode.Uri) {
     _extensionDir = uri;
 }
 
+/**
+ * This function should only be called once, on activation
+ * @param uri Should be: `ExtensionContext.globalStorageUri`
+ */
+export function setGlobalStorageUri(uri: vscode.Uri) {
+    _globalStorageDir = uri;
+}
+
+/**
+ * @returns The directory for data shared between all workspaces, or undefined if the extension hasn't been activated
+ */
+export function getGlobalStorageUri(): vscode.Uri | undefined {
+    return _globalStorageDir;
+}
+
 /**
  * This function cannot be called in top-level. It must be called after the extension has been activated
  * @returns The absolute path to this extension's directory
@@ -39,7 +57,9 @@ export function getExtensionUri(): vscode.Uri {
 export class FPythonScriptFiles {
     static readonly buildDocumentationToC = "documentation/build_toc";
     static readonly getDocPageContent = "documentation/get_page_content";
+    static readonly searchDocumentation = "documentation/search";
     static readonly getStubPath = "get_stub_path";
+    static readonly shardStub = "shard_stub";
     static readonly addSysPath = "add_sys_path";
     static readonly attach = "attach";
     static readonly execute = "execute";
@@ -53,6 +73,39 @@ export class FPythonScriptFiles {
 }
 
 
+/**
+ * Get a version identifier of the python scripts provided by this extension, based on a hash of their content.
+ * Used to check if the scripts installed in Unreal are up to date.
+ */
+export async function getPythonScriptsVersion(): Promise<string> {
+    if (!_pythonScriptsVersion) {
+        const hash = crypto.createHash("sha1");
+
+        const directories = [vscode.Uri.joinPath(getExtensionUri(), "python")];
+        while (directories.length > 0) {
+            const directory = directories.pop()!;
+            const entries = await vscode.workspace.fs.readDirectory(directory);
+            entries.sort(([a], [b]) => a.localeCompare(b));
+
+            for (const [name, fileType] of entries) {
+                const uri = vscode.Uri.joinPath(directory, name);
+                if (fileType === vscode.FileType.Directory && name !== "__pycache__") {
+                    directories.push(uri);
+                }
+                else if (fileType === vscode.FileType.File && name.endsWith(".py")) {
+                    hash.update(path.relative(getExtensionUri().fsPath, uri.fsPath));
+                    hash.update(await vscode.workspace.fs.readFile(uri));
+                }
+            }
+        }
+
+        _pythonScriptsVersion = hash.digest("hex").slice(0, 16);
+    }
+
+    return _pythonScriptsVersion;
+}
+
+
 // -----------------------------------------------------------------------------------------
 //                                  VS Code Utils
 // -----------------------------------------------------------------------------------------
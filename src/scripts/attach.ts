@@ -11,6 +11,10 @@ import * as utils from '../modules/utils';
 
 
 const DEBUGPY_PYPI_URL = "https://pypi.org/project/debugpy/";
+const DEBUGPY_INSTALL_POLL_INTERVAL_MS = 500;
+
+// Directory in the extension's global storage where debugpy wheels are cached, shared between all Unreal Engine installs
+const WHEEL_CACHE_DIRECTORY_NAME = "wheels";
 
 // ------------------------------------------------------------------------------------------
 //                                  Interfaces
@@ -25,6 +29,14 @@ interface IAttachConfiguration {
     type: string;
 };
 
+interface IDebugpyInstallStatus {
+    id: string;
+    state: "running" | "succeeded" | "failed";
+    step: string;
+    output: string[];
+    total_time: number;
+}
+
 
 // ------------------------------------------------------------------------------------------
 //                               Installation of debugpy
@@ -68,19 +80,49 @@ export async function getCurrentDebugpyPort(): Promise<number | null> {
 
 
 /**
- * pip install the "debugpy" python module
+ * pip install the "debugpy" python module.
+ * The install runs in the background in Unreal, and is polled until it's finished while showing the progress.
+ * Downloaded wheels are cached in the extension's global storage, so installing debugpy for another engine version is done offline.
  */
 export async function installDebugpy(): Promise<boolean> {
     logger.info("Installing debugpy...");
 
-    const installDebugpyScript = utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.attach);
-    const response = await remoteHandler.evaluateFunction(installDebugpyScript, "install_debugpy");
-    if (response) {
-        if (response.success && response.result === "True")
-            return true;
+    const attachScript = utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.attach);
+
+    const globalStorageUri = utils.getGlobalStorageUri();
+    const kwargs = globalStorageUri ? { wheel_cache_dirpath: vscode.Uri.joinPath(globalStorageUri, WHEEL_CACHE_DIRECTORY_NAME).fsPath } : {};
+
+    const response = await remoteHandler.evaluateFunction(attachScript, "start_debugpy_install", kwargs);
+    const jobId = response?.success ? response.result.replace(/^'|'$/g, '') : "";
+    if (!jobId) {
+        return false;
     }
 
-    return false;
+    const status = await vscode.window.withProgress({
+        location: vscode.ProgressLocation.Notification,
+        title: "Unreal Python: Installing debugpy"
+    }, async (progress) => {
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, DEBUGPY_INSTALL_POLL_INTERVAL_MS));
+
+            const statusResponse = await remoteHandler.evaluateFunction(attachScript, "get_debugpy_install_status", { job_id: jobId }, false, false);
+            const installStatus = statusResponse?.success ? remoteHandler.parseJsonResult<IDebugpyInstallStatus>(statusResponse.result) : null;
+            if (!installStatus || installStatus.state !== "running") {
+                return installStatus;
+            }
+
+            progress.report({ message: installStatus.step });
+        }
+    });
+
+    if (!status) {
+        return false;
+    }
+
+    logger.info(status.output.join("\n"));
+    logger.info(`debugpy install ${status.state} after ${(status.total_time / 1000).toFixed(1)}s`);
+
+    return status.state === "succeeded";
 }
 
 
@@ -5,6 +5,9 @@
 import * as vscode from 'vscode';
 
 import * as crypto from 'crypto';
+import * as fs from 'fs';
+
+import { StringDecoder } from 'string_decoder';
 
 import * as utils from '../modules/utils';
 import * as logger from '../modules/logger';
@@ -16,6 +19,40 @@ import { IRemoteExecutionMessageCommandOutputData } from "unreal-remote-executio
 
 
 const INPUT_TEMP_PYTHON_FILENAME = "temp_exec";
+const OUTPUT_TEMP_FILENAME = "exec-out";
+const OUTPUT_TAIL_INTERVAL_MS = 250;
+const TICK_TASK_POLL_INTERVAL_MS = 500;
+const PROFILE_NUM_FUNCTIONS = 30;
+
+
+interface IProfiledFunction {
+    name: string;
+    calls: number | null;
+    self_time: number;
+    cumulative_time: number;
+}
+
+interface IProfileReport {
+    mode: string;
+    total_time: number;
+    functions: IProfiledFunction[];
+    collapsed_stacks_filepath: string | null;
+}
+
+interface ITickTaskStatus {
+    id: string;
+    name: string;
+    state: "running" | "finished" | "failed" | "cancelled";
+    num_ticks: number;
+    num_steps: number;
+    active_time: number;
+    total_time: number;
+}
+
+interface IExecuteResult {
+    profile: IProfileReport | null;
+    tick_task: ITickTaskStatus | null;
+}
 
 
 // ------------------------------------------------------------------------------------------
@@ -31,6 +68,15 @@ async function getTempPythonExecFilepath(commandId: string): Promise<vscode.Uri>
 }
 
 
+/**
+ * Get the filepath of the file the output is streamed to while the code is executing
+ * @param commandId: The command ID will be appended to the filename
+ */
+async function getTempOutputFilepath(commandId: string): Promise<vscode.Uri> {
+    return vscode.Uri.joinPath(await utils.getExtensionTempUri(), `${OUTPUT_TEMP_FILENAME}-${commandId}.txt`);
+}
+
+
 // ------------------------------------------------------------------------------------------
 //                                     File handlers
 // ------------------------------------------------------------------------------------------
@@ -42,6 +88,7 @@ async function getTempPythonExecFilepath(commandId: string): Promise<vscode.Uri>
 async function cleanUpTempFiles(commandId: string) {
     const filepaths = [
         await getTempPythonExecFilepath(commandId),
+        await getTempOutputFilepath(commandId),
     ];
 
     for (const filepath of filepaths) {
@@ -52,14 +99,155 @@ async function cleanUpTempFiles(commandId: string) {
 }
 
 
+/**
+ * Periodically reads the lines appended to the output file while the code is executing, and prints them to the output channel
+ */
+class OutputFileTail {
+    private offset = 0;
+    private remainder = "";
+    private reading: Promise<void> | null = null;
+    private interval: NodeJS.Timeout | null = null;
+    private readonly decoder = new StringDecoder("utf8");
+
+    constructor(
+        private readonly filepath: string,
+        private readonly outputChannel: vscode.OutputChannel
+    ) { }
+
+    start() {
+        this.interval = setInterval(() => {
+            if (!this.reading) {
+                this.reading = this.read().finally(() => { this.reading = null; });
+            }
+        }, OUTPUT_TAIL_INTERVAL_MS);
+    }
+
+    /**
+     * Stop tailing the file, after reading & printing any remaining output
+     */
+    async stop() {
+        if (this.interval) {
+            clearInterval(this.interval);
+            this.interval = null;
+        }
+
+        if (this.reading) {
+            await this.reading;
+        }
+        await this.read();
+
+        this.remainder += this.decoder.end();
+        if (this.remainder) {
+            this.outputChannel.appendLine(this.remainder);
+            this.remainder = "";
+        }
+    }
+
+    private async read() {
+        let file: fs.promises.FileHandle;
+        try {
+            file = await fs.promises.open(this.filepath, "r");
+        }
+        catch {
+            // The file hasn't been created yet
+            return;
+        }
+
+        try {
+            const buffer = Buffer.alloc(64 * 1024);
+            while (true) {
+                const { bytesRead } = await file.read(buffer, 0, buffer.length, this.offset);
+                if (bytesRead === 0) {
+                    break;
+                }
+                this.offset += bytesRead;
+
+                // Only print complete lines, the rest is kept until the next read
+                const lines = (this.remainder + this.decoder.write(buffer.subarray(0, bytesRead))).split("\n");
+                this.remainder = lines.pop() ?? "";
+                for (const line of lines) {
+                    this.outputChannel.appendLine(line.trimEnd());
+                }
+            }
+        }
+        finally {
+            await file.close();
+        }
+    }
+}
+
+
 // ------------------------------------------------------------------------------------------
 //                                  Remote Exec
 // ------------------------------------------------------------------------------------------
 
+/**
+ * Format the profiling report as a table
+ */
+function formatProfileReport(report: IProfileReport): string {
+    const lines = [
+        `Profile (${report.mode}): ${report.total_time.toFixed(1)} ms`,
+        `${"cumulative".padStart(12)} ${"self".padStart(12)} ${"calls".padStart(8)}  function`
+    ];
+
+    for (const func of report.functions) {
+        const calls = func.calls === null ? "-" : func.calls.toString();
+        lines.push(`${func.cumulative_time.toFixed(3).padStart(12)} ${func.self_time.toFixed(3).padStart(12)} ${calls.padStart(8)}  ${func.name}`);
+    }
+
+    if (report.collapsed_stacks_filepath) {
+        lines.push(`Collapsed stacks written to: ${report.collapsed_stacks_filepath}`);
+    }
+
+    return lines.join("\n");
+}
+
+
+/**
+ * Format the final status of a tick task
+ */
+function formatTickTaskStatus(status: ITickTaskStatus): string {
+    return `Task '${status.name}' ${status.state} after ${status.num_ticks} ticks (${status.active_time.toFixed(1)} ms active, ${status.total_time.toFixed(1)} ms total)`;
+}
+
+
+/**
+ * Poll the status of a tick task until it's no longer running, the user may cancel the task from the progress notification
+ * @returns The final status of the task
+ */
+async function waitForTickTask(execFile: vscode.Uri, task: ITickTaskStatus): Promise<ITickTaskStatus> {
+    return vscode.window.withProgress({
+        location: vscode.ProgressLocation.Notification,
+        title: `Unreal Python: Running '${task.name}'`,
+        cancellable: true
+    }, async (progress, token) => {
+        token.onCancellationRequested(() => {
+            remoteHandler.evaluateFunction(execFile, "cancel_tick_task", { task_id: task.id }, true, false);
+        });
+
+        let status = task;
+        while (status.state === "running") {
+            await new Promise(resolve => setTimeout(resolve, TICK_TASK_POLL_INTERVAL_MS));
+
+            const response = await remoteHandler.evaluateFunction(execFile, "get_tick_task_status", { task_id: task.id }, true, false);
+            const newStatus = response?.success ? remoteHandler.parseJsonResult<ITickTaskStatus>(response.result) : null;
+            if (!newStatus) {
+                break;
+            }
+
+            status = newStatus;
+            progress.report({ message: `${status.num_ticks} ticks, ${(status.total_time / 1000).toFixed(0)}s` });
+        }
+
+        return status;
+    });
+}
+
+
 /** 
  * Handle the response recived from Unreal
  */
-function handleResponse(message: IRemoteExecutionMessageCommandOutputData, commandId: string, isDebugging: boolean) {
+function handleResponse(message: IRemoteExecutionMessageCommandOutputData, commandId: string, isDebugging: boolean, isOutputStreamed: boolean, tickTaskStatus: ITickTaskStatus | null) {
     if (!message.success) {
         logger.showError("Failed to execute code", Error(message.result));
         return;
@@ -75,8 +263,20 @@ function handleResponse(message: IRemoteExecutionMessageCommandOutputData, comma
         return;
     }
 
-    for (const output of message.output) {
-        outputChannel.appendLine(output.output.trimEnd());
+    // Streamed output has already been printed while the code was executing
+    if (!isOutputStreamed) {
+        for (const output of message.output) {
+            outputChannel.appendLine(output.output.trimEnd());
+        }
+    }
+
+    const profileReport = remoteHandler.parseJsonResult<IExecuteResult>(message.result)?.profile;
+    if (profileReport) {
+        outputChannel.appendLine(formatProfileReport(profileReport));
+    }
+
+    if (tickTaskStatus) {
+        outputChannel.appendLine(formatTickTaskStatus(tickTaskStatus));
     }
 
     outputChannel.appendLine(">>>");
@@ -120,6 +320,20 @@ export async function main() {
     // Write an info file telling mb what script to run, etc.
     const bIsDebugging = projectName !== undefined && utils.isDebuggingUnreal(projectName);
     const nameVar = extensionConfig.get<string>("execute.name");
+    const profile = extensionConfig.get<string>("execute.profile", "off");
+    const tickBudget = extensionConfig.get<number>("execute.tickBudget", 0);
+    const debugLogFlushInterval = extensionConfig.get<number>("execute.debugLogFlushInterval", 100);
+    const debugLogRateLimit = extensionConfig.get<number>("execute.debugLogRateLimit", 1000);
+    const session = extensionConfig.get<string>("execute.session", "");
+    const sessionMemoryBudget = extensionConfig.get<number>("execute.sessionMemoryBudget", 0);
+
+    // When debugging, the output is already streamed to the debug console
+    const outputChannel = utils.getOutputChannel();
+    const outputFilepath = (await getTempOutputFilepath(commandId)).fsPath;
+    const outputTail = extensionConfig.get<boolean>("execute.streamOutput") && !bIsDebugging && outputChannel
+        ? new OutputFileTail(outputFilepath, outputChannel)
+        : null;
+    outputTail?.start();
 
     const execFile = utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.execute);
     const response = await remoteHandler.evaluateFunction(
@@ -129,14 +343,35 @@ export async function main() {
             exec_file: fileToExecute.fsPath,
             exec_origin: vscode.window.activeTextEditor.document.uri.fsPath,
             is_debugging: bIsDebugging,
-            name_var: nameVar
+            name_var: nameVar,
+            profile: profile === "off" ? null : profile,
+            profile_num_functions: PROFILE_NUM_FUNCTIONS,
+            output_file: outputTail ? outputFilepath : null,
+            tick_budget: tickBudget > 0 ? tickBudget / 1000 : null,
+            debug_log_flush_interval: debugLogFlushInterval / 1000,
+            debug_log_rate_limit: debugLogRateLimit,
+            session: session || null,
+            session_memory_budget: sessionMemoryBudget
         },
         true,
         false
     );
 
+    // If the code returned a generator/coroutine, wait for it to finish running across the editor ticks
+    let tickTaskStatus: ITickTaskStatus | null = null;
+    if (response?.success) {
+        const tickTask = remoteHandler.parseJsonResult<IExecuteResult>(response.result)?.tick_task;
+        if (tickTask) {
+            tickTaskStatus = await waitForTickTask(execFile, tickTask);
+        }
+    }
+
+    if (outputTail) {
+        await outputTail.stop();
+    }
+
     if (response) {
-        handleResponse(response, commandId, bIsDebugging);
+        handleResponse(response, commandId, bIsDebugging, outputTail !== null, tickTaskStatus);
         return true;
     }
 
@@ -5,10 +5,24 @@ import * as logger from '../modules/logger';
 import * as utils from '../modules/utils';
 
 
+interface IImportTime {
+    name: string;
+    time: number;
+}
+
+interface IModuleReloadTime {
+    name: string;
+    time: number;
+    success: boolean;
+    imports?: IImportTime[];
+}
+
 interface IReloadResponse {
     num_reloads: number;
     time: number;
     num_failed: number;
+    skipped: string[];
+    modules: IModuleReloadTime[];
 }
 
 let isCommandRegistered = false;
@@ -39,7 +53,7 @@ export async function reload() {
     }
 
     if (parsedResults.num_failed <= 0) {
-        vscode.window.setStatusBarMessage(`$(check) Reloaded ${parsedResults.num_reloads} modules in ${parsedResults.time} ms`, 3500);
+        vscode.window.setStatusBarMessage(`$(check) Reloaded ${parsedResults.num_reloads} modules in ${parsedResults.time} ms (${parsedResults.skipped.length} unchanged)`, 3500);
     }
     else if (!isCommandRegistered) {
         const statusBarItem = vscode.window.createStatusBarItem(vscode.StatusBarAlignment.Left, 5);
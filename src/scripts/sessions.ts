@@ -0,0 +1,103 @@
+/**
+ * List the execution sessions in Unreal with their approximate memory usage, and reset the selected session
+ */
+
+import * as vscode from 'vscode';
+
+import * as remoteHandler from '../modules/remote-handler';
+import * as logger from '../modules/logger';
+import * as utils from '../modules/utils';
+
+
+interface ISessionVariable {
+    name: string;
+    type: string;
+    size: number;
+}
+
+interface ISessionInfo {
+    name: string;
+    size: number;
+    num_variables: number;
+    num_executions: number;
+    idle_time: number;
+    top_variables: ISessionVariable[];
+}
+
+interface ISessionQuickPickItem extends vscode.QuickPickItem {
+    session: ISessionInfo;
+}
+
+
+/**
+ * Format a size in bytes, e.g. "12.3 MB"
+ */
+function formatSize(size: number): string {
+    if (size < 1024 * 1024) {
+        return `${(size / 1024).toFixed(1)} KB`;
+    }
+    return `${(size / (1024 * 1024)).toFixed(1)} MB`;
+}
+
+
+/**
+ * Get the info of all execution sessions, most recently used first
+ */
+export async function getSessionsInfo(): Promise<ISessionInfo[] | null> {
+    const execFile = utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.execute);
+    const response = await remoteHandler.evaluateFunction(execFile, "get_sessions_info", {}, true, false);
+    if (!response?.success) {
+        return null;
+    }
+
+    return remoteHandler.parseJsonResult<ISessionInfo[]>(response.result);
+}
+
+
+/**
+ * Remove all variables of an execution session
+ * @returns `true` if the session existed
+ */
+export async function resetSession(name: string): Promise<boolean> {
+    const execFile = utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.execute);
+    const response = await remoteHandler.evaluateFunction(execFile, "reset_session", { name }, true, false);
+    return response?.success === true && response.result === "'true'";
+}
+
+
+export async function main() {
+    const sessions = await getSessionsInfo();
+    if (!sessions) {
+        return;
+    }
+
+    if (sessions.length === 0) {
+        vscode.window.showInformationMessage("No code has been executed in Unreal yet");
+        return;
+    }
+
+    const items: ISessionQuickPickItem[] = sessions.map(session => ({
+        label: session.name,
+        description: `${formatSize(session.size)}, ${session.num_variables} variables, idle for ${Math.round(session.idle_time)}s`,
+        detail: session.top_variables.map(variable => `${variable.name}: ${variable.type} (${formatSize(variable.size)})`).join(", "),
+        session
+    }));
+
+    const selectedItem = await vscode.window.showQuickPick(items, {
+        title: "Execution Sessions",
+        placeHolder: "Select a session to reset"
+    });
+    if (!selectedItem) {
+        return;
+    }
+
+    const resetOption = "Reset";
+    const selectedOption = await vscode.window.showWarningMessage(
+        `Remove all variables of the session '${selectedItem.session.name}'?`,
+        resetOption
+    );
+
+    if (selectedOption === resetOption && await resetSession(selectedItem.session.name)) {
+        logger.info(`Reset execution session '${selectedItem.session.name}', releasing approximately ${formatSize(selectedItem.session.size)}`);
+    }
+}
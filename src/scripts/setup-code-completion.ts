@@ -12,6 +12,7 @@ import * as logger from '../modules/logger';
 import * as utils from '../modules/utils';
 
 export const STUB_FILE_NAME = "unreal.py";
+export const SHARDED_STUB_DIRECTORY_NAME = "Sharded";
 
 const CONFIG_PYTHON = "python";
 const CONFIG_KEY_EXTRA_PATHS = "analysis.extraPaths";
@@ -23,6 +24,13 @@ interface ISettingsInfo {
     openSettingsCommand: string;
 }
 
+interface IShardStubResult {
+    path: string;
+    written: number;
+    removed: number;
+    total: number;
+}
+
 interface IInspectionSettings {
     globalValue?: string[];
     workspaceValue?: string[];
@@ -36,6 +44,12 @@ interface IInspectionSettings {
  * Based on the currently connected Unreal Engine project.
  */
 export async function getUnrealStubDirectory(): Promise<vscode.Uri | null> {
+    // The directory is retrieved when connecting to Unreal
+    const cachedStubDirectoryPath = remoteHandler.getCachedStubDirectory();
+    if (cachedStubDirectoryPath) {
+        return vscode.Uri.file(cachedStubDirectoryPath);
+    }
+
     const getPythonPathScript = utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.getStubPath);
     const response = await remoteHandler.evaluateFunction(getPythonPathScript, "get_python_stub_dir");
 
@@ -148,7 +162,10 @@ function addPythonAnalysisPath(pathToAdd: string): "add" | "exists" | false {
     }
 
     // Make sure we only have one Unreal stub directory in the extra paths
-    newPathsValue = newPathsValue.filter(path => !path.endsWith("Intermediate/PythonStub"));
+    newPathsValue = newPathsValue.filter(path => {
+        const normalizedPath = path.replace(/\\/g, "/");
+        return !normalizedPath.endsWith("Intermediate/PythonStub") && !normalizedPath.endsWith(`Intermediate/PythonStub/${SHARDED_STUB_DIRECTORY_NAME}`);
+    });
     newPathsValue.push(pathToAdd);
 
     try {
@@ -173,6 +190,25 @@ function addPythonAnalysisPath(pathToAdd: string): "add" | "exists" | false {
 }
 
 
+/**
+ * Split the 'unreal.py' stub file into a package of smaller stub files, only the files that changed since the last time are rewritten.
+ * @param stubDirectoryPath The directory where the 'unreal.py' stub file is located
+ * @returns The directory containing the sharded stub package, or null if the stub could not be sharded
+ */
+export async function shardStubFile(stubDirectoryPath: vscode.Uri): Promise<vscode.Uri | null> {
+    const shardStubScript = utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.shardStub);
+    const response = await remoteHandler.evaluateFunction(shardStubScript, "shard_stub", { stub_dirpath: stubDirectoryPath.fsPath });
+    const result = response?.success ? remoteHandler.parseJsonResult<IShardStubResult>(response.result) : null;
+    if (!result) {
+        return null;
+    }
+
+    logger.info(`Sharded the stub file into ${result.total} files (${result.written} written, ${result.removed} removed)`);
+
+    return vscode.Uri.file(result.path);
+}
+
+
 /**
  * Validate that a 'unreal.py' stub file exists in given directory, and if so add it to the `python.analysis.extraPaths` config.
  * If a valid stub file doesn't exist, user will be prompted to enable developer mode and the path will NOT be added to the python config.
@@ -196,6 +232,15 @@ export async function validateStubAndAddToPath(stubDirectoryPath: vscode.Uri): P
         return false;
     }
 
+    if (utils.getExtensionConfig().get<boolean>("codeCompletion.shardStub", false)) {
+        const shardedDirectoryPath = await shardStubFile(stubDirectoryPath);
+        if (shardedDirectoryPath) {
+            return addPythonAnalysisPath(shardedDirectoryPath.fsPath);
+        }
+
+        logger.info("Failed to shard the stub file, falling back to the 'unreal.py' stub file");
+    }
+
     return addPythonAnalysisPath(stubDirectoryPath.fsPath);
 }
 
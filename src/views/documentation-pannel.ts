@@ -13,7 +13,8 @@ enum EInOutCommands {
     getDocPage = "getDocPage",
     getDropDownAreaOpenStates = "getDropDownAreaOpenStates",
     getMaxListItems = "getMaxListItems",
-    getInitialFilter = "getInitialFilter"
+    getInitialFilter = "getInitialFilter",
+    search = "search"
 }
 
 enum EOutCommands {
@@ -61,10 +62,8 @@ export async function openDocumentationWindow(extensionUri: vscode.Uri, globalSt
 async function getTableOfContents() {
     const getTableOfContentScript = utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.buildDocumentationToC);
 
-    const response = await remoteHandler.evaluateFunction(getTableOfContentScript, "get_table_of_content_json");
-    if (response && response.success) {
-        // As the result is stringified JSON, remove the quotes and parse it
-        const result = response.result.replace(/^'|'$/g, '');
+    const result = await remoteHandler.evaluateFunctionOutOfBand(getTableOfContentScript, "get_table_of_content_json");
+    if (result) {
         try {
             return JSON.parse(result);
         }
@@ -88,10 +87,8 @@ async function getPageContent(module: string) {
         "object_name": module
     };
 
-    const response = await remoteHandler.evaluateFunction(getDocPageContentScirpt, "get_object_documentation_json", kwargs);
-    if (response && response.success) {
-        // As the result is stringified JSON, make it parsable
-        const result = response.result.replace(/^'|'$/g, '').replace(/\\'/g, '\'').replace(/\\\\/g, '\\');
+    const result = await remoteHandler.evaluateFunctionOutOfBand(getDocPageContentScirpt, "get_object_documentation_json", kwargs);
+    if (result) {
         try {
             return JSON.parse(result);
         }
@@ -103,6 +100,48 @@ async function getPageContent(module: string) {
 }
 
 
+interface ISearchResult {
+    object: string;
+    member: string | null;
+    score: number;
+}
+
+interface ISearchResponse {
+    ready: boolean;  // False while Unreal is still building the search index
+    results: ISearchResult[];
+}
+
+
+// Time to wait before searching again while Unreal is building the search index, and the max number of attempts
+const SEARCH_RETRY_DELAY_MS = 500;
+const SEARCH_MAX_ATTEMPTS = 120;
+
+
+/**
+ * Start building the search index in Unreal, the index is built over several editor ticks
+ */
+async function prepareSearchIndex() {
+    const searchScript = utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.searchDocumentation);
+    await remoteHandler.evaluateFunction(searchScript, "prepare_search_index");
+}
+
+
+/**
+ * Search the Unreal Python API
+ * @param query The search query, e.g. "spawn actor"
+ * @param limit Max number of results to return
+ * @returns The best matching objects/members sorted by relevance, or null if the search failed
+ */
+async function searchDocumentation(query: string, limit = 50): Promise<ISearchResponse | null> {
+    const searchScript = utils.FPythonScriptFiles.getUri(utils.FPythonScriptFiles.searchDocumentation);
+
+    // Quotes & backslashes would break the kwargs string literal, and are ignored by the search anyway
+    query = query.replace(/['\\]/g, " ");
+
+    const response = await remoteHandler.evaluateFunction(searchScript, "search", { query, limit });
+    return response?.success ? remoteHandler.parseJsonResult<ISearchResponse>(response.result) : null;
+}
+
 
 export class DocumentationPannel {
     private readonly pannelName = "UE-Python-Documentation";
@@ -115,6 +154,7 @@ export class DocumentationPannel {
     private dropDownAreaStates: { [id: string]: boolean } = {};
     private maxListItems: { [id: string]: number } = {};
     private initialFilter: string | undefined = undefined;
+    private latestSearchQuery: string | undefined = undefined;
 
 
     constructor(
@@ -151,6 +191,9 @@ export class DocumentationPannel {
         if (this.pannel) {
             this.pannel.webview.postMessage({ command: EInOutCommands.getTableOfContents, data: this.tableOfContentsCache });
         }
+
+        // Build the search index while the user looks through the table of contents, so it's ready for the first search
+        prepareSearchIndex();
     }
 
 
@@ -163,6 +206,26 @@ export class DocumentationPannel {
     }
 
 
+    public async sendSearchResults(query: string, limit?: number) {
+        this.latestSearchQuery = query;
+
+        // Wait for Unreal to finish building the search index, unless the user has changed the query in the meantime
+        let response = await searchDocumentation(query, limit);
+        for (let attempt = 1; response && !response.ready && attempt < SEARCH_MAX_ATTEMPTS; attempt++) {
+            await new Promise(resolve => setTimeout(resolve, SEARCH_RETRY_DELAY_MS));
+            if (!this.pannel || this.latestSearchQuery !== query) {
+                return;
+            }
+
+            response = await searchDocumentation(query, limit);
+        }
+
+        if (this.pannel && response?.ready) {
+            this.pannel.webview.postMessage({ command: EInOutCommands.search, data: { query: query, results: response.results } });
+        }
+    }
+
+
     private onDidReceiveMessage(data: any) {
         switch (data.command) {
             case EInOutCommands.getTableOfContents:
@@ -175,6 +238,11 @@ export class DocumentationPannel {
                     this.openDetailsPage(data.data.object, data.data.property);
                     break;
                 }
+            case EInOutCommands.search:
+                {
+                    this.sendSearchResults(data.data.query, data.data.limit);
+                    break;
+                }
             case EInCommands.storeDropDownAreaOpenState:
                 {
                     this.storeDropDownAreaOpenState(data.data.id, data.data.value);
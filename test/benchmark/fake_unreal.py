@@ -0,0 +1,267 @@
+"""
+Generates a synthetic stand-in for the `unreal` module, so the Python helpers can be benchmarked without a running editor.
+
+The generated module mimics the layout of the real API: `Object` classes in inheritance chains, enums deriving from `EnumBase`,
+structs deriving from `StructBase`, delegates, module level functions and docstrings in the formats Unreal generates.
+Reflected methods are Python descriptors, as C method descriptors with custom docstrings can't be created from Python.
+"""
+from __future__ import annotations
+
+import tempfile
+import random
+import types
+import sys
+
+# Share of `num_classes` for each kind of class, roughly matching the distribution of a UE5 editor with default plugins
+CLASS_SHARES = {
+    "object": 0.45,
+    "struct": 0.30,
+    "enum": 0.18,
+    "delegate": 0.07,
+}
+
+# Number of module level functions, relative to `num_classes`
+FUNCTION_SHARE = 0.1
+
+# Max number of classes between `Object` and a generated class, e.g. Object > Actor > Pawn > Character
+MAX_INHERITANCE_DEPTH = 8
+
+WORDS = (
+    "actor", "component", "asset", "level", "world", "material", "mesh", "texture", "sound", "animation",
+    "transform", "location", "rotation", "scale", "name", "path", "class", "object", "property", "tag",
+    "editor", "subsystem", "widget", "camera", "light", "socket", "bone", "curve", "value", "index"
+)
+VERBS = ("get", "set", "is", "add", "remove", "find", "spawn", "load", "save", "update")
+TYPES = ("bool", "int32", "float", "str", "Name", "Text", "Vector", "Rotator", "Transform", "Object", "Array[Name]")
+
+
+class MethodDescriptor:
+    """ Stand-in for the reflected methods, `inspect.ismethoddescriptor` is True for these just like for the real ones """
+
+    def __init__(self, name: str, doc: str):
+        self.__name__ = name
+        self.__doc__ = doc
+
+    def __get__(self, instance, owner=None):
+        return self
+
+
+def get_class_docstring(name: str, module_name: str, property_names: list[str]) -> str:
+    lines = [
+        name,
+        "",
+        f"An automatically generated {name} used for benchmarking.",
+        "",
+        "**C++ Source:**",
+        "",
+        f"- **Module**: {module_name}",
+        f"- **File**: {name}.h",
+        "",
+        "**Editor Properties:** (see get_editor_property/set_editor_property)",
+        "",
+    ]
+    lines.extend(f"- ``{property_name}`` (float):  [Read-Write] The {property_name.replace('_', ' ')}" for property_name in property_names)
+    return "\n".join(lines)
+
+
+def get_method_docstring(name: str, args: list[str], return_type: str) -> str:
+    lines = [
+        f"x.{name}({', '.join(args)}) -> {return_type}",
+        f"{name.replace('_', ' ').capitalize()}.",
+        "",
+    ]
+    if args:
+        lines.append("Args:")
+        lines.extend(f"    {arg} ({TYPES[len(arg) % len(TYPES)]}): The {arg.replace('_', ' ')}" for arg in args)
+        lines.append("")
+    lines.append("Returns:")
+    lines.append(f"    {return_type}: The result")
+    return "\n".join(lines)
+
+
+class FakeUnrealGenerator:
+    def __init__(self, num_classes: int, seed: int, intermediate_dirpath: str):
+        self.num_classes = num_classes
+        self.random = random.Random(seed)
+        self.intermediate_dirpath = intermediate_dirpath
+        self.module = types.ModuleType("unreal", "Synthetic stand-in for the Unreal Engine Python API")
+
+        # Docstrings are shared between methods with the same signature, like interned strings in the real module
+        self.method_cache: dict[tuple[str, int], MethodDescriptor] = {}
+
+    def get_method(self, name: str, num_args: int) -> MethodDescriptor:
+        key = (name, num_args)
+        method = self.method_cache.get(key)
+        if method is None:
+            args = [f"{WORDS[(len(name) + i) % len(WORDS)]}_{i}" for i in range(num_args)]
+            method = MethodDescriptor(name, get_method_docstring(name, args, TYPES[(len(name) * 7 + num_args) % len(TYPES)]))
+            self.method_cache[key] = method
+        return method
+
+    def get_member_names(self, prefix_words: tuple[str, ...], count: int) -> list[str]:
+        return sorted({f"{self.random.choice(prefix_words)}_{self.random.choice(WORDS)}_{self.random.choice(WORDS)}" for _ in range(count)})
+
+    def add_base_classes(self):
+        module = self.module
+
+        class EnumBase(int):
+            """ Base for all Unreal enums """
+            value = int.__dict__["real"]
+            name = int.__dict__["imag"]
+
+        class StructBase:
+            """ Base for all Unreal structs """
+
+        class DelegateBase:
+            """ Base for all Unreal delegates """
+
+        class MulticastDelegateBase:
+            """ Base for all Unreal multicast delegates """
+
+        class _ObjectBase:
+            """ Base for all Unreal object types """
+
+        class Object(_ObjectBase):
+            pass
+
+        Object.__doc__ = get_class_docstring("Object", "CoreUObject", ["outer"])
+        for name in ("get_name", "get_outer", "get_class", "get_path_name", "get_editor_property", "set_editor_property"):
+            setattr(Object, name, self.get_method(name, 1 if name.endswith("property") else 0))
+        Object.static_class = staticmethod(len)
+
+        for cls in (EnumBase, StructBase, DelegateBase, MulticastDelegateBase, _ObjectBase, Object):
+            cls.__module__ = "unreal"
+            setattr(module, cls.__name__, cls)
+
+    def add_object_classes(self, count: int):
+        object_classes = [self.module.Object]
+        depths = {self.module.Object: 0}
+        for i in range(count):
+            # Inherit from a random class, creating inheritance chains of varying depth
+            parent = self.random.choice(object_classes)
+            if depths[parent] >= MAX_INHERITANCE_DEPTH:
+                parent = self.module.Object
+            name = f"{self.random.choice(WORDS).capitalize()}{self.random.choice(WORDS).capitalize()}{i}"
+
+            property_names = self.get_member_names(WORDS, self.random.randint(0, 20))
+            namespace = {"__doc__": get_class_docstring(name, "Engine", property_names), "__module__": "unreal"}
+            for method_name in self.get_member_names(VERBS, self.random.randint(0, 30)):
+                namespace[method_name] = self.get_method(method_name, self.random.randint(0, 3))
+            for property_name in property_names[:10]:
+                namespace[property_name] = int.__dict__["real"]
+
+            cls = type(name, (parent,), namespace)
+            depths[cls] = depths[parent] + 1
+            object_classes.append(cls)
+            setattr(self.module, name, cls)
+
+    def add_structs(self, count: int):
+        for i in range(count):
+            name = f"{self.random.choice(WORDS).capitalize()}Info{i}"
+            property_names = self.get_member_names(WORDS, self.random.randint(1, 12))
+            namespace = {"__doc__": get_class_docstring(name, "CoreUObject", property_names), "__module__": "unreal"}
+            for property_name in property_names:
+                namespace[property_name] = float.__dict__["real"]
+            for method_name in self.get_member_names(VERBS, self.random.randint(0, 4)):
+                namespace[method_name] = self.get_method(method_name, 1)
+
+            setattr(self.module, name, type(name, (self.module.StructBase,), namespace))
+
+    def add_enums(self, count: int):
+        for i in range(count):
+            name = f"E{self.random.choice(WORDS).capitalize()}Type{i}"
+            cls = type(name, (self.module.EnumBase,), {"__doc__": f"{name}\n\n**C++ Source:**\n\n- **Module**: Engine", "__module__": "unreal"})
+            for value, member_name in enumerate(sorted({self.random.choice(WORDS).upper() for _ in range(self.random.randint(2, 12))})):
+                setattr(cls, member_name, cls(value))
+
+            setattr(self.module, name, cls)
+
+    def add_delegates(self, count: int):
+        for i in range(count):
+            name = f"On{self.random.choice(WORDS).capitalize()}Changed{i}"
+            base = self.module.MulticastDelegateBase if i % 3 else self.module.DelegateBase
+            cls = type(name, (base,), {"__doc__": f"{name}\n\n**C++ Source:**\n\n- **Module**: Engine", "__module__": "unreal"})
+            setattr(self.module, name, cls)
+
+    def add_functions(self, count: int):
+        for i in range(count):
+            name = f"{self.random.choice(VERBS)}_{self.random.choice(WORDS)}_{i}"
+
+            def function(*args, **kwargs):
+                return None
+
+            function.__name__ = name
+            function.__doc__ = self.get_method(name, self.random.randint(0, 3)).__doc__
+            setattr(self.module, name, function)
+
+    def add_editor_functions(self):
+        """ Functions & classes used by the helpers themselves """
+        module = self.module
+        intermediate_dirpath = self.intermediate_dirpath
+        tick_callbacks: dict[object, object] = {}
+
+        class Paths:
+            @staticmethod
+            def project_intermediate_dir():
+                return intermediate_dirpath
+
+        class SystemLibrary:
+            @staticmethod
+            def get_engine_version():
+                return "5.4.0-benchmark"
+
+        def register_slate_post_tick_callback(callback):
+            handle = object()
+            tick_callbacks[handle] = callback
+            return handle
+
+        def unregister_slate_post_tick_callback(handle):
+            tick_callbacks.pop(handle, None)
+
+        def tick(delta_seconds: float = 1 / 60):
+            """ Not part of the real API, call the registered tick callbacks """
+            for callback in list(tick_callbacks.values()):
+                callback(delta_seconds)
+
+        module.Paths = Paths
+        module.SystemLibrary = SystemLibrary
+        module.register_slate_post_tick_callback = register_slate_post_tick_callback
+        module.unregister_slate_post_tick_callback = unregister_slate_post_tick_callback
+        module.tick = tick
+        module.get_interpreter_executable_path = lambda: sys.executable
+
+        # Log messages are discarded, printing them would dominate the timings
+        module.log = module.log_warning = module.log_error = lambda msg: None
+
+    def generate(self) -> types.ModuleType:
+        self.add_base_classes()
+        self.add_object_classes(int(self.num_classes * CLASS_SHARES["object"]))
+        self.add_structs(int(self.num_classes * CLASS_SHARES["struct"]))
+        self.add_enums(int(self.num_classes * CLASS_SHARES["enum"]))
+        self.add_delegates(int(self.num_classes * CLASS_SHARES["delegate"]))
+        self.add_functions(int(self.num_classes * FUNCTION_SHARE))
+        self.add_editor_functions()
+        return self.module
+
+
+def install(num_classes: int = 1000, seed: int = 0, intermediate_dirpath: str | None = None) -> types.ModuleType:
+    """
+    Generate a fake `unreal` module and add it to `sys.modules`, replacing any previously installed one
+    :param num_classes: Total number of classes, enums, structs & delegates to generate
+    :param intermediate_dirpath: Returned by `unreal.Paths.project_intermediate_dir()`, defaults to a new temp folder
+    """
+    if intermediate_dirpath is None:
+        intermediate_dirpath = tempfile.mkdtemp(prefix="fake-unreal-intermediate-")
+
+    module = FakeUnrealGenerator(num_classes, seed, intermediate_dirpath).generate()
+    sys.modules["unreal"] = module
+    return module
+
+
+if __name__ == "__main__":
+    import time
+
+    for num_classes in (1000, 10000, 100000):
+        start_time = time.perf_counter()
+        unreal = install(num_classes)
+        print(f"{num_classes:>7} classes: {len(vars(unreal))} objects generated in {time.perf_counter() - start_time:.2f}s")
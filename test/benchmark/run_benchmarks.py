@@ -0,0 +1,431 @@
+"""
+Benchmarks for the hot paths of the Python helpers, run against a generated fake `unreal` module (see fake_unreal.py)
+so they can run on any machine, without Unreal Engine.
+
+Usage:
+    python test/benchmark/run_benchmarks.py                          Run & compare against baselines.json
+    python test/benchmark/run_benchmarks.py --save-baselines         Run 3 times & store the median results as the new baselines
+    python test/benchmark/run_benchmarks.py --num-classes 1000 100000 --filter build_toc
+
+Exits with code 1 if the median time or the peak memory of any benchmark is more than `--max-ratio` times its baseline,
+time differences below `MIN_REGRESSION_MS` are ignored since they're mostly noise for the fastest benchmarks.
+The timings are absolute, so they're only compared against baselines recorded in the same environment (see `get_environment`),
+exits with code 2 otherwise. Record your own baselines first, e.g. on the commit before your changes:
+    python test/benchmark/run_benchmarks.py --save-baselines --baselines local-baselines.json
+    python test/benchmark/run_benchmarks.py --baselines local-baselines.json
+"""
+from __future__ import annotations
+
+import tracemalloc
+import contextlib
+import statistics
+import argparse
+import platform
+import tempfile
+import shutil
+import time
+import json
+import sys
+import io
+import os
+
+import fake_unreal
+
+BENCHMARK_DIRPATH = os.path.dirname(os.path.abspath(__file__))
+PYTHON_DIRPATH = os.path.join(os.path.dirname(os.path.dirname(BENCHMARK_DIRPATH)), "python")
+BASELINES_FILEPATH = os.path.join(BENCHMARK_DIRPATH, "baselines.json")
+
+HELPERS_PACKAGE_NAME = "vscode_unreal_python"
+
+NUM_PAGES = 100
+NUM_EVAL_CALLS = 1000
+RELOAD_CHANGED_SHARE = 0.05
+
+# Number of times the suite is run by default when saving baselines, each result is the median of the runs
+NUM_BASELINE_RUNS = 3
+
+# A slower median time is only a regression if it's also at least this much slower than the baseline
+MIN_REGRESSION_MS = 1.0
+
+
+class BenchmarkContext:
+    """ A fake `unreal` module of a given size, and `vsc_eval` set up the same way as in remote-handler.ts """
+
+    def __init__(self, num_classes: int, num_modules: int, temp_dirpath: str):
+        self.num_classes = num_classes
+        self.num_modules = num_modules
+        self.temp_dirpath = temp_dirpath
+
+        # Helper modules imported for a previous context still reference the previous `unreal` module
+        for module_name in [name for name in sys.modules if name.split(".")[0] == HELPERS_PACKAGE_NAME]:
+            del sys.modules[module_name]
+
+        self.unreal = fake_unreal.install(num_classes, intermediate_dirpath=os.path.join(temp_dirpath, "Intermediate"))
+
+        vsc_eval_filepath = os.path.join(PYTHON_DIRPATH, "vsc_eval.py")
+        self.vsc_globals = {"__file__": vsc_eval_filepath, "__name__": "__main__"}
+        with open(vsc_eval_filepath, 'r', encoding="utf-8") as file:
+            exec(compile(file.read(), vsc_eval_filepath, 'exec'), self.vsc_globals)
+
+    def vsc_eval(self, script: str, function_name: str, use_globals: bool = False, **kwargs):
+        filepath = os.path.join(PYTHON_DIRPATH, f"{script}.py")
+        return self.vsc_globals["vsc_eval"](filepath, function_name, use_globals, **kwargs)
+
+    def forget_helper_module(self, script: str):
+        """ Remove a helper module from `sys.modules`, so the next call starts without any of its module level caches """
+        sys.modules.pop(f"{HELPERS_PACKAGE_NAME}.{script.replace('/', '.')}", None)
+
+
+class Benchmark:
+    """ Base class for all benchmarks, `setup` is called before each timed call to `run` """
+    name = ""
+
+    def __init__(self, context: BenchmarkContext):
+        self.context = context
+
+    def setup(self):
+        pass
+
+    def run(self):
+        raise NotImplementedError
+
+
+class BuildTocBenchmark(Benchmark):
+    name = "build_toc"
+
+    def run(self):
+        self.context.vsc_eval("documentation/build_toc", "get_table_of_content_json", use_cache=False)
+
+
+class BuildTocCachedBenchmark(Benchmark):
+    name = "build_toc_cached"
+
+    def run(self):
+        self.context.vsc_eval("documentation/build_toc", "get_table_of_content_json", use_cache=True)
+
+
+class GetPageContentBenchmark(Benchmark):
+    name = f"get_page_content_{NUM_PAGES}_pages"
+
+    def __init__(self, context: BenchmarkContext):
+        super().__init__(context)
+        class_names = sorted(name for name, obj in vars(context.unreal).items() if isinstance(obj, type))
+        step = max(1, len(class_names) // NUM_PAGES)
+        self.object_names = class_names[::step][:NUM_PAGES]
+
+    def setup(self):
+        self.context.forget_helper_module("documentation/get_page_content")
+
+    def run(self):
+        for object_name in self.object_names:
+            self.context.vsc_eval("documentation/get_page_content", "get_object_documentation_json", object_name=object_name)
+
+
+class ExportDocumentationBenchmark(Benchmark):
+    """ Export the documentation of the entire API """
+    name = "export_documentation"
+
+    def setup(self):
+        self.context.forget_helper_module("documentation/get_page_content")
+
+    def run(self):
+        output_file = os.path.join(self.context.temp_dirpath, "documentation.ndjson")
+        self.context.vsc_eval("documentation/get_page_content", "export_documentation", output_file=output_file)
+
+
+class SearchBenchmark(Benchmark):
+    """ First search of a session, including building the index over the editor ticks """
+    name = "search"
+
+    def setup(self):
+        self.context.forget_helper_module("documentation/search")
+
+    def run(self):
+        while not json.loads(self.context.vsc_eval("documentation/search", "search", query="get actor"))["ready"]:
+            self.context.unreal.tick()
+
+
+class SearchQueryBenchmark(Benchmark):
+    """ Search with an index that has already been built """
+    name = "search_query"
+
+    def setup(self):
+        while not json.loads(self.context.vsc_eval("documentation/search", "search", query="get actor"))["ready"]:
+            self.context.unreal.tick()
+
+    def run(self):
+        self.context.vsc_eval("documentation/search", "search", query="spawn actor")
+
+
+class ReloadBenchmark(Benchmark):
+    """ Reload a workspace where a share of the modules have changed, each module imports a few of the previous modules """
+    name = "reload"
+
+    PACKAGE_NAME = "benchmark_workspace"
+
+    def __init__(self, context: BenchmarkContext):
+        super().__init__(context)
+        self.workspace_dirpath = os.path.join(context.temp_dirpath, "workspace")
+        self.package_dirpath = os.path.join(self.workspace_dirpath, self.PACKAGE_NAME)
+        self.num_runs = 0
+
+        os.makedirs(self.package_dirpath, exist_ok=True)
+        with open(os.path.join(self.package_dirpath, "__init__.py"), 'w', encoding="utf-8"):
+            pass
+        for index in range(context.num_modules):
+            self.write_module(index, 0)
+
+        for module_name in [name for name in sys.modules if name.split(".")[0] == self.PACKAGE_NAME]:
+            del sys.modules[module_name]
+
+        sys.path.append(self.workspace_dirpath)
+        for index in range(context.num_modules):
+            __import__(f"{self.PACKAGE_NAME}.module_{index}")
+
+        # The first reload records the state of every module
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.context.vsc_eval("reload", "reload", workspace_folders=[self.workspace_dirpath])
+
+    def write_module(self, index: int, version: int):
+        imports = "\n".join(f"from . import module_{dependency}" for dependency in range(max(0, index - 3), index))
+        functions = "\n\n".join(f"def function_{i}(value):\n    return value * {i} + {version}\n" for i in range(20))
+        with open(os.path.join(self.package_dirpath, f"module_{index}.py"), 'w', encoding="utf-8") as file:
+            file.write(f"{imports}\n\nVERSION = {version}\n\n{functions}")
+
+    def setup(self):
+        self.num_runs += 1
+        num_changed = max(1, int(self.context.num_modules * RELOAD_CHANGED_SHARE))
+        for index in range(num_changed):
+            self.write_module((self.num_runs * num_changed + index) % self.context.num_modules, self.num_runs)
+
+    def run(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.context.vsc_eval("reload", "reload", workspace_folders=[self.workspace_dirpath])
+
+
+class ExecuteCodeBenchmark(Benchmark):
+    """ Execute a script that has already been executed, and thereby compiled, before """
+    name = "execute_code"
+
+    def __init__(self, context: BenchmarkContext):
+        super().__init__(context)
+        self.code = self.get_code(0)
+        self.filename = os.path.join(context.temp_dirpath, "benchmark_script.py")
+
+    @staticmethod
+    def get_code(seed: int) -> str:
+        functions = "\n\n".join(
+            f"def function_{i}(values):\n"
+            f"    total = {seed}\n"
+            f"    for value in values:\n"
+            f"        if value % {i + 2} == 0:\n"
+            f"            total += value\n"
+            f"    return total\n"
+            for i in range(200)
+        )
+        return f"{functions}\n\nresult = function_0(range(50))\nresult\n"
+
+    def run(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.context.vsc_eval("execute", "execute_code", True, code=self.code, filename=self.filename)
+
+
+class ExecuteCodeUncachedBenchmark(ExecuteCodeBenchmark):
+    """ Execute a script that hasn't been executed before, so it has to be parsed & compiled """
+    name = "execute_code_uncached"
+
+    def setup(self):
+        self.code = self.get_code(int(time.perf_counter_ns()))
+
+
+class VscEvalBenchmark(Benchmark):
+    name = f"vsc_eval_{NUM_EVAL_CALLS}_calls"
+
+    def run(self):
+        for _ in range(NUM_EVAL_CALLS):
+            self.context.vsc_eval("get_stub_path", "get_python_stub_dir")
+
+
+BENCHMARKS = (
+    BuildTocBenchmark,
+    BuildTocCachedBenchmark,
+    GetPageContentBenchmark,
+    ExportDocumentationBenchmark,
+    SearchBenchmark,
+    SearchQueryBenchmark,
+    ReloadBenchmark,
+    ExecuteCodeBenchmark,
+    ExecuteCodeUncachedBenchmark,
+    VscEvalBenchmark,
+)
+
+
+def run_benchmark(benchmark: Benchmark, num_repeats: int, num_warmups: int) -> dict:
+    timings = []
+    for index in range(num_warmups + num_repeats):
+        benchmark.setup()
+        start_time = time.perf_counter()
+        benchmark.run()
+        elapsed_time = time.perf_counter() - start_time
+        if index >= num_warmups:
+            timings.append(elapsed_time * 1000)
+
+    # Measure the peak memory in a separate run, as tracing the allocations slows down the code
+    benchmark.setup()
+    tracemalloc.start()
+    try:
+        benchmark.run()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "peak_mb": round(peak_memory / (1024 * 1024), 3),
+        "repeats": num_repeats
+    }
+
+
+def run_benchmarks(num_classes_list: list[int], num_modules: int, num_repeats: int, num_warmups: int, name_filter: str | None) -> dict:
+    """ :returns: {benchmark_name: {num_classes: timings}} """
+    results: dict[str, dict[str, dict]] = {}
+    for num_classes in num_classes_list:
+        temp_dirpath = tempfile.mkdtemp(prefix="vscode-unreal-python-benchmark-")
+        try:
+            print(f"Generating fake unreal module with {num_classes} classes")
+            context = BenchmarkContext(num_classes, num_modules, temp_dirpath)
+
+            for benchmark_class in BENCHMARKS:
+                if name_filter and name_filter not in benchmark_class.name:
+                    continue
+
+                timings = run_benchmark(benchmark_class(context), num_repeats, num_warmups)
+                results.setdefault(benchmark_class.name, {})[str(num_classes)] = timings
+                print(f"  {benchmark_class.name:<32} {timings['median_ms']:>12.3f} ms  (min {timings['min_ms']:.3f} ms)  {timings['peak_mb']:>10.3f} MB peak")
+        finally:
+            shutil.rmtree(temp_dirpath, ignore_errors=True)
+
+    return results
+
+
+def get_environment() -> str:
+    """ Get the OS, CPU architecture, number of CPUs & Python version, timings are only comparable within the same environment """
+    return f"{platform.system()}-{platform.machine()}-{os.cpu_count()}cpu-python{sys.version_info[0]}.{sys.version_info[1]}"
+
+
+def merge_runs(runs: list[dict]) -> dict:
+    """ Combine the results of several runs of the suite, using the median of the runs for each benchmark """
+    results: dict[str, dict[str, dict]] = {}
+    for name, scales in runs[0].items():
+        for num_classes, timings in scales.items():
+            run_timings = [run[name][num_classes] for run in runs]
+            results.setdefault(name, {})[num_classes] = {
+                "median_ms": round(statistics.median(t["median_ms"] for t in run_timings), 3),
+                "min_ms": min(t["min_ms"] for t in run_timings),
+                "max_ms": max(t["max_ms"] for t in run_timings),
+                "peak_mb": round(statistics.median(t["peak_mb"] for t in run_timings), 3),
+                "repeats": timings["repeats"],
+                "runs": len(runs)
+            }
+
+    return results
+
+
+def compare_to_baselines(results: dict, baselines: dict, max_ratio: float) -> list[str]:
+    """ :returns: A message for each benchmark that is slower than its baseline by more than `max_ratio` """
+    regressions = []
+    for name, scales in results.items():
+        for num_classes, timings in scales.items():
+            baseline = baselines.get(name, {}).get(num_classes)
+            if not baseline:
+                continue
+
+            for key, unit in (("median_ms", "ms"), ("peak_mb", "MB")):
+                if key not in baseline:
+                    continue
+
+                if key == "median_ms" and timings[key] - baseline[key] < MIN_REGRESSION_MS:
+                    continue
+
+                ratio = timings[key] / baseline[key] if baseline[key] else 1.0
+                if ratio > max_ratio:
+                    regressions.append(f"{name} ({num_classes} classes): {timings[key]:.3f} {unit} is {ratio:.2f}x the baseline of {baseline[key]:.3f} {unit}")
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-classes", type=int, nargs="+", default=[1000, 10000], help="Size(s) of the generated unreal module")
+    parser.add_argument("--num-modules", type=int, default=500, help="Number of modules in the workspace reloaded by the reload benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs of each benchmark")
+    parser.add_argument("--warmup", type=int, default=1, help="Number of untimed runs before the timed runs")
+    parser.add_argument("--runs", type=int, help=f"Number of times the whole suite is run, the median of the runs is used. Defaults to {NUM_BASELINE_RUNS} with --save-baselines, otherwise 1")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this string")
+    parser.add_argument("--baselines", default=BASELINES_FILEPATH, help="Filepath of the baselines JSON file")
+    parser.add_argument("--save-baselines", action="store_true", help="Store the results as the new baselines")
+    parser.add_argument("--max-ratio", type=float, default=1.5, help="Max allowed ratio between the median time/peak memory and the baseline")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    num_runs = args.runs or (NUM_BASELINE_RUNS if args.save_baselines else 1)
+    runs = []
+    for index in range(num_runs):
+        if num_runs > 1:
+            print(f"Run {index + 1}/{num_runs}")
+        runs.append(run_benchmarks(args.num_classes, args.num_modules, args.repeat, args.warmup, args.filter))
+    results = merge_runs(runs) if num_runs > 1 else runs[0]
+
+    data = {
+        "environment": get_environment(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+
+    if args.save_baselines:
+        # Keep the baselines of benchmarks/sizes that weren't run, if they were recorded in the same environment
+        baselines = {}
+        if os.path.isfile(args.baselines):
+            with open(args.baselines, 'r', encoding="utf-8") as file:
+                previous_data = json.load(file)
+            if previous_data.get("environment") == data["environment"]:
+                baselines = previous_data["results"]
+        for name, scales in results.items():
+            baselines.setdefault(name, {}).update(scales)
+
+        with open(args.baselines, 'w', encoding="utf-8") as file:
+            json.dump({**data, "results": baselines}, file, indent=2)
+            file.write("\n")
+        print(f"Baselines saved to {args.baselines}")
+        return 0
+
+    if not os.path.isfile(args.baselines):
+        print(f"No baselines found at {args.baselines}, run with --save-baselines to create them")
+        return 0
+
+    with open(args.baselines, 'r', encoding="utf-8") as file:
+        baselines_data = json.load(file)
+
+    # Absolute timings from another OS, CPU or Python version can't be compared
+    if baselines_data.get("environment") != data["environment"]:
+        print(f"The baselines were recorded in '{baselines_data.get('environment')}', not in '{data['environment']}'.")
+        print("Record baselines in this environment first, e.g. on the commit before your changes, with --save-baselines")
+        return 2
+
+    regressions = compare_to_baselines(results, baselines_data["results"], args.max_ratio)
+
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
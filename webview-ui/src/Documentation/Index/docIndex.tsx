@@ -35,6 +35,23 @@ interface FilteredTableOfContents {
 }
 
 
+interface SearchResult {
+    object: string,
+    member: string | null,
+    score: number
+}
+
+
+// Max number of ranked search results shown above the filtered table of contents
+const SEARCH_RESULT_LIMIT = 20;
+
+// Time to wait after the user stops typing before searching, since each search is a round trip to Unreal
+const SEARCH_DELAY_MS = 250;
+
+// Shorter filters match too much by prefix to rank, the local filtering is enough for those
+const MIN_SEARCH_QUERY_LENGTH = 3;
+
+
 interface DocIndexProps {
     onItemClicked: (name: string) => void;
     onFilterChanged: (filter: string) => void;
@@ -44,20 +61,25 @@ interface DocIndexProps {
 
 
 export default class DocIndex extends Component<DocIndexProps> {
-    state = { bLoading: true, tableOfContents: {}, filter: "" };
+    state = { bLoading: true, tableOfContents: {}, filter: "", searchResults: [] as SearchResult[] };
 
     contentRef: React.RefObject<HTMLDivElement>;
     numberOfDDAUpdates = 0;
     maxListItems: { [id: string]: number } = {};
+    searchTimeout?: ReturnType<typeof setTimeout>;
 
     constructor(props: DocIndexProps) {
         super(props);
 
         this.state.filter = props.filter;
         this.contentRef = createRef();
+        this.onSearchResults = this.onSearchResults.bind(this);
     }
 
     async componentDidMount() {
+        vscode.listener.addListener(vscode.EInOutCommands.search, this.onSearchResults);
+        this.requestSearchResults(this.state.filter);
+
         // Request the table of contents from the extension
         const tableOfContents: RawTableOfContents = await vscode.sendMessageAndWaitForResponse(vscode.EInOutCommands.getTableOfContents);
         this.maxListItems = await vscode.sendMessageAndWaitForResponse(vscode.EInOutCommands.getMaxListItems);
@@ -73,6 +95,11 @@ export default class DocIndex extends Component<DocIndexProps> {
         });
     }
 
+    componentWillUnmount() {
+        clearTimeout(this.searchTimeout);
+        vscode.listener.removeListener(vscode.EInOutCommands.search, this.onSearchResults);
+    }
+
     onDropDownAreaUpdated(id: string) {
         if (this.numberOfDDAUpdates >= Object.keys(this.state.tableOfContents).length) {
             return;
@@ -112,8 +139,29 @@ export default class DocIndex extends Component<DocIndexProps> {
     }
 
     applyFilter(searchText: string) {
-        this.setState({ filter: searchText });
+        this.setState({ filter: searchText, searchResults: [] });
         this.props.onFilterChanged(searchText);
+        this.requestSearchResults(searchText);
+    }
+
+    /**
+     * Ask the extension to search the Unreal Python API for the filter, the results are received in `onSearchResults`
+     */
+    requestSearchResults(query: string) {
+        clearTimeout(this.searchTimeout);
+        if (query.trim().length < MIN_SEARCH_QUERY_LENGTH)
+            return;
+
+        this.searchTimeout = setTimeout(() => {
+            vscode.sendMessage(vscode.EInOutCommands.search, { query, limit: SEARCH_RESULT_LIMIT });
+        }, SEARCH_DELAY_MS);
+    }
+
+    onSearchResults(data: { query: string, results: SearchResult[] }) {
+        // Ignore results of an older filter that arrived after the user kept typing
+        if (data.query === this.state.filter) {
+            this.setState({ searchResults: data.results });
+        }
     }
 
     /**
@@ -137,6 +185,29 @@ export default class DocIndex extends Component<DocIndexProps> {
     }
 
 
+    renderSearchResults() {
+        if (!this.state.filter || this.state.searchResults.length === 0) {
+            return;
+        }
+
+        return (
+            <DropDownArea key="search-results" id="doc-index-search-results" title="Best Matches" badgeCount={this.state.searchResults.length}>
+                <div className="doc-index-dd-content">
+                    {
+                        this.state.searchResults.map((result, index) => {
+                            const fullname = result.member ? `${result.object}.${result.member}` : result.object;
+                            return (
+                                <span key={index} onClick={() => this.props.onItemClicked(fullname)}>
+                                    {fullname}
+                                </span>
+                            );
+                        })
+                    }
+                </div>
+            </DropDownArea>
+        );
+    }
+
     renderContent() {
         let content: FilteredTableOfContents = {};
         if (this.state.filter) {
@@ -247,6 +318,8 @@ export default class DocIndex extends Component<DocIndexProps> {
                 <div ref={this.contentRef} className="main-content" id="doc-index-content">
                     {this.renderProgressRing()}
 
+                    {this.renderSearchResults()}
+
                     {this.renderContent()}
                 </div>
 
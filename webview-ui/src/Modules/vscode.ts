@@ -6,7 +6,8 @@ export enum EInOutCommands {
     getDocPage = "getDocPage",
     getDropDownAreaOpenStates = "getDropDownAreaOpenStates",
     getMaxListItems = "getMaxListItems",
-    getInitialFilter = "getInitialFilter"
+    getInitialFilter = "getInitialFilter",
+    search = "search"
 }
 
 export enum EOutCommands {